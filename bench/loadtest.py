@@ -0,0 +1,353 @@
+"""
+Banc de charge hors ligne du bot.
+
+Lance un faux serveur Nitter local (processus séparé) qui publie des tweets
+synthétiques selon un processus de Poisson, avec latence et erreurs
+configurables, puis fait tourner l'échéancier, la récupération et l'envoi de
+`TwitterMonitorBot` contre des canaux Discord factices qui enregistrent les
+messages reçus. Aucune connexion réseau externe n'est nécessaire.
+
+Chaque échelle tourne dans son propre sous-processus pour isoler la mémoire.
+Rapport : débit de requêtes, notifications, latence de détection p50/p99
+(publication -> message Discord), tweets manqués, doublons et mémoire maximale.
+
+Usage:
+    python bench/loadtest.py                          # échelles 10, 1000, 10000
+    python bench/loadtest.py --scales 100 --duration 30 --latency 0.2 --error-rate 0.05
+    python bench/loadtest.py --scales 1000 --max-p99 30   # code de sortie 1 si dépassé
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TWEPOCH_MS = 1288834974657   # époque des IDs Twitter (snowflake)
+FEED_SIZE = 20               # items servis par flux, comme Nitter
+STATUS_RE = re.compile(r"/status/(\d+)")
+
+
+# ------------------------------------------------------------------
+# Chronologie synthétique des publications
+# ------------------------------------------------------------------
+
+class Timeline:
+    """Publications d'un compte, déterministes pour une graine et une origine données"""
+
+    def __init__(self, handle: str, origin: float, mean_gap: float, seed: int):
+        self._rng = random.Random(f"{seed}:{handle}")
+        self._mean_gap = mean_gap
+        self.times = []
+        self.ids = []
+        self._next = origin - FEED_SIZE * mean_gap   # historique préexistant
+
+    def extend(self, until: float):
+        while self._next <= until:
+            self.times.append(self._next)
+            publish_ms = int(self._next * 1000) - TWEPOCH_MS
+            self.ids.append((publish_ms << 22) | (len(self.ids) & 0x3FFFFF))
+            self._next += self._rng.expovariate(1 / self._mean_gap)
+
+    def latest(self, now: float, count: int) -> list[tuple[int, float]]:
+        """Les `count` dernières publications antérieures à `now`, de la plus récente à la plus ancienne"""
+        self.extend(now)
+        end = bisect.bisect_right(self.times, now)
+        return [(self.ids[i], self.times[i]) for i in range(end - 1, max(end - count, 0) - 1, -1)]
+
+
+def published_at(tweet_id: int) -> float:
+    return ((tweet_id >> 22) + TWEPOCH_MS) / 1000
+
+
+def handle_name(index: int) -> str:
+    return f"bench_{index:05d}"
+
+
+# ------------------------------------------------------------------
+# Faux serveur Nitter
+# ------------------------------------------------------------------
+
+def render_feed(host: str, handle: str, posts: list[tuple[int, float]]) -> str:
+    items = "".join(
+        f"<item><title>Annonce {tweet_id}</title>"
+        f"<dc:creator>@{handle}</dc:creator>"
+        f"<description>&lt;p&gt;Annonce synthétique {tweet_id}&lt;/p&gt;</description>"
+        f"<pubDate>{format_datetime(datetime.fromtimestamp(when, timezone.utc), usegmt=True)}</pubDate>"
+        f"<guid>http://{host}/{handle}/status/{tweet_id}#m</guid>"
+        f"<link>http://{host}/{handle}/status/{tweet_id}#m</link></item>"
+        for tweet_id, when in posts
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">'
+        f"<channel><title>{handle} / X</title>{items}</channel></rss>"
+    )
+
+
+def run_fake_nitter(ports: list[int], origin: float, args_json: str):
+    """Point d'entrée du processus serveur"""
+    from aiohttp import web
+
+    args = json.loads(args_json)
+    timelines = {}
+    rng = random.Random(args["seed"])
+
+    async def feed(request: web.Request) -> web.Response:
+        handle = request.match_info["handle"]
+        delay = rng.expovariate(1 / args["latency"]) if args["latency"] else 0
+        if delay:
+            await asyncio.sleep(delay)
+        if rng.random() < args["error_rate"]:
+            return web.Response(status=503)
+
+        timeline = timelines.get(handle)
+        if timeline is None:
+            timeline = timelines[handle] = Timeline(handle, origin, args["post_interval"], args["seed"])
+        posts = timeline.latest(time.time(), FEED_SIZE)
+        etag = f'"{posts[0][0] if posts else 0}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=render_feed(request.host, handle, posts),
+            content_type="application/rss+xml",
+            headers={"ETag": etag},
+        )
+
+    async def serve():
+        for port in ports:
+            app = web.Application()
+            app.router.add_get("/{handle}/rss", feed)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ------------------------------------------------------------------
+# Discord factice
+# ------------------------------------------------------------------
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+
+    def get_role(self, role_id):
+        return None
+
+
+class FakeChannel:
+    """Canal qui enregistre l'heure de réception de chaque tweet notifié"""
+
+    def __init__(self, chan_id: int, guild: FakeGuild, sink: dict):
+        self.id = chan_id
+        self.name = f"channel-{chan_id}"
+        self.guild = guild
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs):
+        received = time.time()
+        for tweet_id in STATUS_RE.findall(content or ""):
+            self._sink.setdefault((self.id, int(tweet_id)), []).append(received)
+
+
+# ------------------------------------------------------------------
+# Exécution d'une échelle
+# ------------------------------------------------------------------
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_scale(args, main) -> dict:
+    rng = random.Random(args.seed)
+    bot = main.TwitterMonitorBot()
+    await bot.setup_hook()
+
+    sink = {}
+    channels = {}
+    guild_count = max(1, args.handles // 10)
+    subscriptions = []
+    origin = args.origin
+
+    for index in range(args.handles):
+        handle = handle_name(index)
+        cursor = Timeline(handle, origin, args.post_interval, args.seed).latest(origin, 1)
+        for _ in range(args.subs_per_handle):
+            guild_id = rng.randrange(guild_count) + 1
+            chan_id = guild_id * 100 + rng.randrange(3)
+            if chan_id not in channels:
+                guild = FakeGuild(guild_id)
+                channels[chan_id] = FakeChannel(chan_id, guild, sink)
+                bot.guild_settings[guild_id] = {"check_interval": args.interval}
+            if bot.add_subscription(guild_id, chan_id, handle, str(cursor[0][0]) if cursor else None):
+                subscriptions.append((chan_id, handle))
+    bot.get_channel = channels.get
+
+    async def drive():
+        while True:
+            await bot.monitor_twitter.coro(bot)
+
+    started = time.time()
+    driver = asyncio.create_task(drive())
+    await asyncio.sleep(args.duration)
+    driver.cancel()
+    # Laisser les lots et la file d'envoi se vider
+    deadline = time.time() + args.interval
+    while (bot._batches or bot.delivery.depth) and time.time() < deadline:
+        await asyncio.sleep(0.1)
+    elapsed = time.time() - started
+
+    requests = sum(main.FETCH_RESPONSES._values.values())
+    responses = {dict(labels)["code"]: 0 for labels in main.FETCH_RESPONSES._values}
+    for labels, count in main.FETCH_RESPONSES._values.items():
+        responses[dict(labels)["code"]] += count
+
+    # Tweets publiés assez tôt pour devoir être détectés avant la fin
+    horizon = started + args.duration - args.interval * (1 + main.SCHEDULER_JITTER) - 2 * args.latency
+    missed = 0
+    duplicates = 0
+    latencies = []
+    for chan_id, handle in subscriptions:
+        timeline = Timeline(handle, origin, args.post_interval, args.seed)
+        timeline.extend(started + args.duration)
+        for tweet_id, when in zip(timeline.ids, timeline.times):
+            if when <= origin:
+                continue
+            received = sink.get((chan_id, tweet_id))
+            if received:
+                latencies.append(received[0] - published_at(tweet_id))
+                duplicates += len(received) - 1
+            elif when <= horizon:
+                missed += 1
+
+    await bot.close()
+    return {
+        "handles": args.handles,
+        "subscriptions": len(subscriptions),
+        "duration_s": round(elapsed, 1),
+        "requests_per_s": round(requests / elapsed, 1),
+        "responses": responses,
+        "notifications": sum(len(times) for times in sink.values()),
+        "detection_p50_s": round(percentile(latencies, 0.50), 2),
+        "detection_p99_s": round(percentile(latencies, 0.99), 2),
+        "missed": missed,
+        "duplicates": duplicates,
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def worker(args) -> dict:
+    ports = [free_port() for _ in range(args.instances)]
+    os.environ["NITTER_INSTANCES"] = ",".join(f"http://127.0.0.1:{port}" for port in ports)
+    os.environ["STATE_DB_PATH"] = ":memory:"
+    os.environ["METRICS_PORT"] = "0"
+    os.environ.setdefault("POLL_CONCURRENCY", str(args.concurrency))
+    os.environ.setdefault("INSTANCE_CONCURRENCY", str(args.concurrency))
+    os.environ.setdefault("HTTP_POOL_LIMIT_PER_HOST", str(args.concurrency))
+    sys.path.insert(0, ROOT)
+
+    import logging
+    logging.disable(logging.WARNING)
+    import main
+
+    args.origin = time.time()
+    server_args = json.dumps({
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "post_interval": args.post_interval,
+        "seed": args.seed,
+    })
+    server = multiprocessing.Process(target=run_fake_nitter, args=(ports, args.origin, server_args), daemon=True)
+    server.start()
+    try:
+        for port in ports:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        return asyncio.run(run_scale(args, main))
+    finally:
+        server.terminate()
+
+
+# ------------------------------------------------------------------
+# Orchestration
+# ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10,1000,10000", help="nombres de comptes, séparés par des virgules")
+    parser.add_argument("--duration", type=float, default=60, help="durée de chaque échelle, en secondes")
+    parser.add_argument("--interval", type=int, default=15, help="check_interval des serveurs, en secondes")
+    parser.add_argument("--post-interval", type=float, default=120, help="intervalle moyen entre deux tweets d'un compte")
+    parser.add_argument("--latency", type=float, default=0.05, help="latence moyenne du faux Nitter, en secondes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument("--instances", type=int, default=2, help="nombre de fausses instances Nitter")
+    parser.add_argument("--subs-per-handle", type=int, default=2, help="abonnements par compte")
+    parser.add_argument("--concurrency", type=int, default=50, help="POLL_CONCURRENCY / INSTANCE_CONCURRENCY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-p99", type=float, help="échec si la latence de détection p99 dépasse ce seuil")
+    parser.add_argument("--json", action="store_true", help="sortie JSON, une ligne par échelle")
+    parser.add_argument("--handles", type=int, help=argparse.SUPPRESS)   # mode worker
+    args = parser.parse_args()
+
+    if args.handles is not None:
+        print(json.dumps(worker(args)))
+        return
+
+    failed = False
+    passthrough = [
+        f"--{name.replace('_', '-')}={value}"
+        for name, value in vars(args).items()
+        if name not in ("scales", "json", "max_p99", "handles")
+    ]
+
+    for scale in (int(value) for value in args.scales.split(",")):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--handles", str(scale), *passthrough],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(
+                f"{result['handles']:>6} comptes ({result['subscriptions']} abonnements) | "
+                f"{result['requests_per_s']:>7.1f} req/s | {result['notifications']:>6} notifications | "
+                f"détection p50 {result['detection_p50_s']:>6.2f}s p99 {result['detection_p99_s']:>6.2f}s | "
+                f"manqués {result['missed']} doublons {result['duplicates']} | {result['max_rss_mib']} Mio"
+            )
+        if args.max_p99 is not None and result["detection_p99_s"] > args.max_p99:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark de l'analyse des flux RSS Nitter.
+
+Compare l'ancien chemin (feedparser sur tout le flux pour lire le premier item)
+au parseur incrémental `parse_feed`. Celui-ci lit toujours tout le flux (l'ordre
+des items ne suit pas les IDs) : `limit` et `since_id` ne changent que la sélection,
+pas le coût de l'analyse.
+
+Usage: python bench/parse_bench.py [--items 20] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import feedparser  # noqa: E402
+
+from main import parse_feed  # noqa: E402
+
+
+def build_feed(handle: str, items: int) -> bytes:
+    """Génère un flux RSS proche de ceux servis par Nitter"""
+    body = []
+    for i in range(items):
+        tweet_id = 1800000000000000000 - i
+        description = "&lt;p&gt;" + ("Annonce de la prochaine bannière de Wuthering Waves ! " * 8) + "&lt;/p&gt;"
+        body.append(
+            f"<item>"
+            f"<title>Annonce {tweet_id}</title>"
+            f"<dc:creator>@{handle}</dc:creator>"
+            f"<description>{description}</description>"
+            f"<pubDate>Mon, 01 Jan 2024 12:{i % 60:02d}:00 GMT</pubDate>"
+            f"<guid>https://nitter.net/{handle}/status/{tweet_id}#m</guid>"
+            f"<link>https://nitter.net/{handle}/status/{tweet_id}#m</link>"
+            f"</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">'
+        f"<channel><title>{handle} / X</title><link>https://nitter.net/{handle}</link>"
+        + "".join(body)
+        + "</channel></rss>"
+    ).encode()
+
+
+def legacy_path(body: bytes):
+    """Chemin historique : feedparser analyse et nettoie tout le flux"""
+    feed = feedparser.parse(body)
+    return feed.entries[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20, help="items par flux (Nitter en sert ~20)")
+    parser.add_argument("--repeat", type=int, default=200, help="analyses par mesure")
+    args = parser.parse_args()
+
+    handle = "Wuthering_Waves_Global"
+    body = build_feed(handle, args.items)
+    cursor = parse_feed(body, handle)[2]["id"]
+    empty = build_feed(handle, 0)
+
+    cases = [
+        ("feedparser (ancien chemin)", lambda: legacy_path(body)),
+        ("parse_feed limit=1", lambda: parse_feed(body, handle, limit=1)),
+        ("parse_feed since_id (2 nouveaux)", lambda: parse_feed(body, handle, since_id=cursor)),
+        ("parse_feed flux complet", lambda: parse_feed(body, handle)),
+        ("parse_feed flux vide", lambda: parse_feed(empty, handle)),
+    ]
+
+    print(f"Flux de {args.items} items, {len(body)} octets, {args.repeat} analyses par mesure\n")
+    baseline = None
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.repeat, repeat=5)) / args.repeat
+        baseline = baseline or best
+        print(f"{name:<36} {best * 1e6:>10.1f} µs/flux   x{baseline / best:.1f}")
+
+
+if __name__ == "__main__":
+    main()
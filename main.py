@@ -1,38 +1,1866 @@
 import discord
 from discord.ext import commands, tasks
 import aiohttp
+from aiohttp import web
 import asyncio
+import atexit
+import bisect
+import contextlib
+import csv
 import feedparser
+import functools
+import hashlib
+import heapq
+import io
+import itertools
 import json
 import os
 import logging
-from datetime import datetime, timedelta
+import logging.handlers
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from collections import Counter as TallyCounter, OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
+# Configuration du logging : écriture dans un thread dédié, messages répétés limités
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()                 # "text" ou "json"
+LOG_DEDUP_LEVEL = os.getenv("LOG_DEDUP_LEVEL", "WARNING").upper()    # niveau minimal soumis à la limitation
+LOG_DEDUP_WINDOW = float(os.getenv("LOG_DEDUP_WINDOW", "60"))        # secondes par fenêtre de comptage
+LOG_DEDUP_BURST = int(os.getenv("LOG_DEDUP_BURST", "3"))             # messages similaires émis par fenêtre
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par message, pour l'agrégation des logs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if hasattr(record, "suppressed"):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Laisse passer LOG_DEDUP_BURST messages similaires par fenêtre (comptes, canaux et
+    nombres masqués), écarte les suivants avant tout formatage et publie en fin de
+    fenêtre un résumé « N messages similaires supprimés ».
+    """
+
+    MASK_RE = re.compile(r"@\w+|#[\w-]+|\d+(?:\.\d+)?")
+
+    def __init__(self, window: float, burst: int, level: int):
+        super().__init__()
+        self._window = window
+        self._burst = burst
+        self._level = level
+        self._lock = threading.Lock()
+        self._windows = {}  # {(logger, niveau, message masqué): [début, émis, supprimés, exemple]}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self._level or hasattr(record, "suppressed"):
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, self.MASK_RE.sub("*", message))
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                self._windows[key] = [time.monotonic(), 1, 0, message]
+                return True
+            if state[1] < self._burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            state[3] = message
+            return False
+
+    def sweep(self):
+        """Clôt les fenêtres écoulées et publie un résumé pour celles qui ont écarté des messages"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [(key, state) for key, state in self._windows.items() if now - state[0] >= self._window]
+            for key, _ in expired:
+                del self._windows[key]
+        for (name, level, _), (_, _, suppressed, sample) in expired:
+            if suppressed:
+                logging.getLogger(name).log(
+                    level, f"{suppressed} message(s) similaire(s) supprimé(s) en {self._window:.0f}s, dernier: {sample}",
+                    extra={"suppressed": suppressed},
+                )
+
+    def run(self):
+        while True:
+            time.sleep(self._window / 2)
+            self.sweep()
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Les appels de log ne font que déposer l'enregistrement dans une file ;
+    un thread d'écoute l'écrit sur la sortie standard.
+    """
+    stream = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    rate_limit = RateLimitFilter(LOG_DEDUP_WINDOW, LOG_DEDUP_BURST, logging.getLevelName(LOG_DEDUP_LEVEL))
+    handler.addFilter(rate_limit)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # vider la file à l'arrêt
+    threading.Thread(target=rate_limit.run, name="log-summaries", daemon=True).start()
+    return listener
+
+
+log_listener = setup_logging()
 logger = logging.getLogger(__name__)
 
-class TwitterMonitorBot(commands.Bot):
+# Pool de connexions HTTP partagé (surchargeable via variables d'environnement)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))                # connexions simultanées au total
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))  # connexions par instance Nitter
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))   # secondes
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))            # secondes
+HTTP_REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "10"))       # secondes
+
+# Moteur de récupération concurrent
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", "20"))          # comptes récupérés en parallèle
+INSTANCE_CONCURRENCY = int(os.getenv("INSTANCE_CONCURRENCY", "5"))   # requêtes simultanées par instance Nitter
+
+# Instances Nitter (liste séparée par des virgules) et disjoncteurs
+NITTER_INSTANCES = [
+    url.strip().rstrip("/")
+    for url in os.getenv("NITTER_INSTANCES", "https://nitter.net,https://nitter.it,https://nitter.privacydev.net").split(",")
+    if url.strip()
+]
+INSTANCE_EWMA_ALPHA = float(os.getenv("INSTANCE_EWMA_ALPHA", "0.2"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))  # échecs consécutifs avant ouverture
+BREAKER_BASE_COOLDOWN = float(os.getenv("BREAKER_BASE_COOLDOWN", "30"))       # secondes
+BREAKER_MAX_COOLDOWN = float(os.getenv("BREAKER_MAX_COOLDOWN", "900"))        # secondes
+
+# Requêtes couvertes (hedging) : seconde requête si la première tarde
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("true", "1", "yes", "on")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))         # percentile de latence déclenchant la couverture
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))            # secondes
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "2"))      # secondes, tant que l'historique est insuffisant
+HEDGE_BUDGET_PER_MINUTE = int(os.getenv("HEDGE_BUDGET_PER_MINUTE", "20"))   # requêtes supplémentaires max par minute
+
+# Analyse des flux hors de la boucle d'événements
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "thread").lower()   # "thread" ou "process"
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+PARSE_CHUNK_SIZE = 8192                                          # octets fournis au parseur incrémental par étape
+
+# Stockage persistant (pointer vers un disque persistant sur Render)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state.db")
+STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "5"))   # secondes entre deux écritures groupées
+
+# Archive locale des tweets récupérés (recherche plein texte)
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+ARCHIVE_MAX_AGE_DAYS = float(os.getenv("ARCHIVE_MAX_AGE_DAYS", "365"))    # tweets plus anciens supprimés
+ARCHIVE_MAX_ROWS = int(os.getenv("ARCHIVE_MAX_ROWS", "200000"))           # taille maximale de l'archive
+ARCHIVE_PRUNE_INTERVAL = 3600                                             # secondes entre deux purges
+SEARCH_MAX_RESULTS = 8
+
+# Échéancier de récupération
+DEFAULT_CHECK_INTERVAL = 300                                   # secondes
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))   # fraction aléatoire de l'intervalle (±)
+
+# Fréquence adaptative
+DEFAULT_MIN_INTERVAL = 60         # secondes
+DEFAULT_MAX_INTERVAL = 1800       # secondes
+ADAPTIVE_HISTORY = 50             # publications mémorisées par compte
+ADAPTIVE_BURST_WINDOW = 900       # secondes : rythme maximal juste après une publication
+ADAPTIVE_TARGET_FRACTION = 8      # vérifications visées par intervalle médian entre deux publications
+
+# File d'envoi des notifications
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "10"))   # canaux servis en parallèle
+DELIVERY_MAX_BATCH = int(os.getenv("DELIVERY_MAX_BATCH", "5"))        # tweets regroupés dans un message
+DELIVERY_IDLE_TIMEOUT = 60.0                                          # secondes avant l'arrêt d'un worker inactif
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "3"))  # tentatives par message (erreurs transitoires)
+DELIVERY_RETRY_DELAY = float(os.getenv("DELIVERY_RETRY_DELAY", "2"))  # secondes, doublées à chaque tentative
+DELIVERY_DRAIN_TIMEOUT = float(os.getenv("DELIVERY_DRAIN_TIMEOUT", "15"))  # secondes accordées aux envois à l'arrêt
+
+# Rattrapage des tweets manqués entre deux vérifications
+MAX_CATCHUP_PER_TICK = int(os.getenv("MAX_CATCHUP_PER_TICK", "10"))   # tweets distribués par compte et par vérification
+
+# Index des tweets déjà annoncés (mémoire constante par compte)
+SEEN_LRU_SIZE = int(os.getenv("SEEN_LRU_SIZE", "64"))          # IDs récents mémorisés exactement
+SEEN_BLOOM_BITS = int(os.getenv("SEEN_BLOOM_BITS", "4096"))    # taille d'une génération du filtre de Bloom
+SEEN_BLOOM_HASHES = 5
+SEEN_BLOOM_CAPACITY = SEEN_BLOOM_BITS // 10                    # insertions avant rotation (~1 % de faux positifs)
+
+# Serveur HTTP embarqué (/metrics et /healthz) ; Render fournit PORT, 0 désactive
+METRICS_PORT = int(os.getenv("METRICS_PORT", os.getenv("PORT", "0")))
+LOOP_LAG_INTERVAL = 0.5   # secondes entre deux mesures du retard de la boucle d'événements
+
+# Profilage (désactivé par défaut, activable à chaud avec !ww perf on)
+PROFILING_ENABLED = os.getenv("PROFILING", "false").lower() in ("true", "1", "yes", "on")
+STALL_THRESHOLD = float(os.getenv("STALL_THRESHOLD", "0.25"))   # secondes sans réaction de la boucle = blocage
+WATCHDOG_INTERVAL = 0.1                                         # secondes entre deux sondes du watchdog
+PROFILE_SAMPLE_INTERVAL = 0.005                                 # secondes entre deux échantillons de pile
+PROFILE_MAX_SECONDS = 60
+
+# Import groupé d'abonnements
+BULK_MAX_HANDLES = int(os.getenv("BULK_MAX_HANDLES", "100"))   # comptes par commande
+BULK_MAX_FILE_SIZE = 256 * 1024                                # octets par pièce jointe
+
+# Répartition horizontale : shards du gateway et workers de récupération
+SHARD_COUNT = os.getenv("SHARD_COUNT")   # "auto" ou nombre de shards ; active AutoShardedBot
+SHARD_IDS = [int(shard) for shard in os.getenv("SHARD_IDS", "").split(",") if shard.strip()]   # shards de ce processus
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))   # processus se partageant les comptes à récupérer
+WORKER_ID = int(os.getenv("WORKER_ID", "0"))         # de 0 à WORKER_COUNT - 1
+WORKER_MODE = os.getenv("WORKER_MODE", "gateway").lower()   # "gateway" ou "poller" (REST seulement, sans commandes)
+HASH_RING_REPLICAS = 256                             # points virtuels par worker sur l'anneau
+SUBSCRIPTION_SYNC_INTERVAL = float(os.getenv("SUBSCRIPTION_SYNC_INTERVAL", "30"))   # secondes entre deux relectures
+
+# ------------------------------------------------------------------
+# Métriques Prometheus
+# ------------------------------------------------------------------
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metric:
+    """Métrique nommée, avec une série par combinaison de labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}  # {((label, valeur), ...): valeur}
+        # Une nouvelle métrique du même nom remplace l'ancienne (ex. nouvelle instance du bot)
+        METRICS[:] = [metric for metric in METRICS if metric.name != name]
+        METRICS.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Jauge lue au moment du scrape via une fonction"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read=None):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def render(self) -> list[str]:
+        if self.read is not None:
+            self._values = {(): self.read()}
+        return super().render()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][i] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+
+METRICS: list[Metric] = []
+
+FETCH_SECONDS = Histogram("ww_nitter_fetch_seconds", "Latence des requêtes RSS par instance Nitter et issue (200, 304, 429, 5xx, timeout, error)")
+FETCH_RESPONSES = Counter("ww_nitter_responses_total", "Réponses des instances Nitter par code (200, 304, 429, 5xx, timeout, error)")
+PARSE_SECONDS = Histogram("ww_feed_parse_seconds", "Durée d'analyse d'un flux RSS")
+BATCH_SECONDS = Histogram("ww_poll_batch_seconds", "Durée d'un lot de comptes échus")
+SCHEDULER_LAG = Histogram("ww_scheduler_lag_seconds", "Retard entre l'échéance d'un compte et sa prise en charge")
+EVENT_LOOP_LAG = Histogram("ww_event_loop_lag_seconds", "Retard de réveil de la boucle d'événements")
+DELIVERY_LAG = Histogram("ww_delivery_lag_seconds", "Délai entre la mise en file d'un tweet et son envoi")
+NOTIFICATIONS_SENT = Counter("ww_notifications_sent_total", "Tweets notifiés sur Discord")
+NOTIFICATIONS_FAILED = Counter("ww_notifications_failed_total", "Tweets dont l'envoi sur Discord a échoué")
+EVENT_LOOP_STALLS = Counter("ww_event_loop_stalls_total", "Blocages de la boucle d'événements détectés par le watchdog")
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+# ------------------------------------------------------------------
+# Profilage
+# ------------------------------------------------------------------
+
+def _frame_label(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+class PhaseProfiler:
+    """
+    Temps cumulés par phase (fetch, parse, filter, send...) et blocages de la boucle
+    d'événements. Désactivé, record() se limite à un test.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.phases = {}                 # {phase: [appels, total, max]}
+        self.stalls = deque(maxlen=20)   # [(horodatage, durée, pile)]
+        self.since = time.time()
+
+    def record(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ranked(self) -> list[tuple[str, list]]:
+        """Phases de la plus coûteuse à la moins coûteuse (temps total)"""
+        return sorted(self.phases.items(), key=lambda item: item[1][1], reverse=True)
+
+    def reset(self):
+        self.phases.clear()
+        self.stalls.clear()
+        self.since = time.time()
+
+
+PROFILER = PhaseProfiler(PROFILING_ENABLED)
+
+
+class LoopWatchdog(threading.Thread):
+    """
+    Sonde la boucle d'événements depuis un thread : si un rappel n'est pas exécuté
+    dans les STALL_THRESHOLD secondes, la pile du thread de la boucle désigne le
+    callback bloquant (feedparser synchrone, écriture disque, calcul...).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, profiler: PhaseProfiler, threshold: float = STALL_THRESHOLD):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self._loop = loop
+        self._loop_thread = threading.get_ident()   # construit depuis le thread de la boucle
+        self._profiler = profiler
+        self._threshold = threshold
+        self._stopped = threading.Event()
+
+    def run(self):
+        beat = threading.Event()
+        while not self._stopped.is_set():
+            beat.clear()
+            sent = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(beat.set)
+            except RuntimeError:
+                return  # boucle fermée
+
+            if not beat.wait(self._threshold):
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = [_frame_label(entry) for entry in traceback.extract_stack(frame)[-6:]] if frame else []
+                while not beat.wait(WATCHDOG_INTERVAL) and not self._stopped.is_set():
+                    pass
+                duration = time.perf_counter() - sent
+                self._profiler.stalls.append((time.time(), duration, stack))
+                EVENT_LOOP_STALLS.inc()
+                logger.warning(f"Boucle d'événements bloquée {duration:.2f}s dans {stack[-1] if stack else 'inconnu'}")
+
+            self._stopped.wait(WATCHDOG_INTERVAL)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def sample_profile(thread_id: int, seconds: float, interval: float = PROFILE_SAMPLE_INTERVAL) -> dict:
+    """
+    Profil par échantillonnage de la pile d'un thread (à lancer depuis un autre thread).
+    Retourne le temps propre (fonction en cours) et cumulé (fonction présente dans la pile)
+    en nombre d'échantillons ; l'attente dans le sélecteur compte comme inactivité.
+    """
+    own = TallyCounter()
+    cumulative = TallyCounter()
+    samples = idle = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        stack = traceback.extract_stack(frame)
+        samples += 1
+        if stack[-1].filename.endswith("selectors.py"):
+            idle += 1
+        else:
+            own[_frame_label(stack[-1])] += 1
+            cumulative.update({
+                f"{os.path.basename(entry.filename)} {entry.name}"
+                for entry in stack
+                if f"{os.sep}asyncio{os.sep}" not in entry.filename and not entry.filename.endswith("threading.py")
+            })
+        time.sleep(interval)
+    return {"samples": samples, "idle": idle, "own": own, "cumulative": cumulative}
+
+
+# ------------------------------------------------------------------
+# Santé des instances Nitter
+# ------------------------------------------------------------------
+
+class InstanceHealth:
+    """Statistiques glissantes (EWMA) et disjoncteur d'une instance Nitter"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.semaphore = asyncio.Semaphore(INSTANCE_CONCURRENCY)
+        self.latency = None           # EWMA de la latence, en secondes
+        self.latency_samples = deque(maxlen=200)
+        self.error_rate = 0.0         # EWMA des erreurs (0 à 1)
+        self.rate_limit_rate = 0.0    # EWMA des réponses 429 (0 à 1)
+        self.requests = 0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.cooldown = BREAKER_BASE_COOLDOWN
+        self.open_until = 0.0         # time.monotonic() de la prochaine sonde
+        self.probe_in_flight = False
+
+    def score(self) -> float:
+        """Coût estimé d'une requête : plus il est bas, plus l'instance est prioritaire"""
+        latency = self.latency if self.latency is not None else HTTP_REQUEST_TIMEOUT / 4
+        return latency * (1 + 4 * self.error_rate + 4 * self.rate_limit_rate)
+
+    def hedge_delay(self) -> float:
+        """Délai avant d'envoyer une requête de couverture (percentile des latences récentes)"""
+        if len(self.latency_samples) < 10:
+            return HEDGE_DEFAULT_DELAY
+        samples = sorted(self.latency_samples)
+        return max(HEDGE_MIN_DELAY, samples[int(HEDGE_PERCENTILE * (len(samples) - 1))])
+
+    def _update(self, latency: float | None, error: bool, rate_limited: bool):
+        alpha = INSTANCE_EWMA_ALPHA
+        self.requests += 1
+        if latency is not None:
+            self.latency_samples.append(latency)
+            self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        self.error_rate = alpha * float(error) + (1 - alpha) * self.error_rate
+        self.rate_limit_rate = alpha * float(rate_limited) + (1 - alpha) * self.rate_limit_rate
+
+
+class NitterInstancePool:
+    """Classe les instances par santé et les isole derrière des disjoncteurs"""
+
+    def __init__(self, urls: list[str]):
+        self.instances = [InstanceHealth(url) for url in urls]
+
+    def ranked(self) -> list[InstanceHealth]:
+        """Instances utilisables, de la plus saine à la moins saine"""
+        now = time.monotonic()
+        available = []
+        for instance in self.instances:
+            if instance.state == InstanceHealth.OPEN and now >= instance.open_until:
+                # Délai écoulé : une seule requête de sonde est autorisée
+                instance.state = InstanceHealth.HALF_OPEN
+                instance.probe_in_flight = False
+
+            if instance.state == InstanceHealth.OPEN:
+                continue
+            if instance.state == InstanceHealth.HALF_OPEN and instance.probe_in_flight:
+                continue
+            available.append(instance)
+
+        available.sort(key=InstanceHealth.score)
+        return available
+
+    def try_acquire(self, instance: InstanceHealth) -> bool:
+        """Autorise une requête vers l'instance (une seule sonde à la fois en semi-ouvert)"""
+        if instance.state == InstanceHealth.OPEN:
+            return False
+        if instance.state == InstanceHealth.HALF_OPEN:
+            if instance.probe_in_flight:
+                return False
+            instance.probe_in_flight = True
+        return True
+
+    def record_success(self, instance: InstanceHealth, latency: float):
+        instance._update(latency, error=False, rate_limited=False)
+        instance.consecutive_failures = 0
+        if instance.state != InstanceHealth.CLOSED:
+            logger.info(f"Instance {instance.url} rétablie")
+        instance.state = InstanceHealth.CLOSED
+        instance.cooldown = BREAKER_BASE_COOLDOWN
+        instance.probe_in_flight = False
+
+    def record_failure(self, instance: InstanceHealth, rate_limited: bool = False, retry_after: float | None = None):
+        instance._update(None, error=not rate_limited, rate_limited=rate_limited)
+        instance.consecutive_failures += 1
+        instance.probe_in_flight = False
+
+        if instance.state == InstanceHealth.HALF_OPEN:
+            # Sonde échouée : on rouvre avec un délai doublé
+            instance.cooldown = min(instance.cooldown * 2, BREAKER_MAX_COOLDOWN)
+        elif not rate_limited and instance.consecutive_failures < BREAKER_FAILURE_THRESHOLD:
+            return
+
+        cooldown = max(instance.cooldown, retry_after or 0)
+        instance.state = InstanceHealth.OPEN
+        instance.open_until = time.monotonic() + cooldown
+        logger.warning(f"Instance {instance.url} désactivée pour {cooldown:.0f}s")
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Convertit un en-tête Retry-After exprimé en secondes"""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# ------------------------------------------------------------------
+# Analyse des flux RSS
+# ------------------------------------------------------------------
+
+_STATUS_ID_RE = re.compile(r"/status(?:es)?/(\d+)")
+
+
+def tweet_id_value(tweet_id: str | None) -> int:
+    """Valeur numérique d'un ID de tweet (les IDs sont croissants dans le temps), -1 si inconnue"""
+    if not tweet_id:
+        return -1
+    match = re.match(r"\d+", tweet_id.rsplit("/", 1)[-1])
+    return int(match.group()) if match else -1
+
+
+def _make_entry(handle: str, guid: str | None, link: str | None, title: str | None,
+                summary: str | None, published: str | None) -> dict | None:
+    """Construit un tweet à partir des champs d'un item RSS"""
+    # Extraire l'ID du tweet depuis l'URL
+    source = guid or link
+    if not source:
+        return None
+    match = _STATUS_ID_RE.search(source)
+    tweet_id = match.group(1) if match else source.split("/")[-1].split("#")[0]
+
+    if not tweet_id:
+        return None
+
+    try:
+        published_at = parsedate_to_datetime(published) if published else None
+    except (TypeError, ValueError):
+        published_at = None
+
+    return {
+        "id": tweet_id,
+        "url": (link or "").replace("nitter", "x.com").replace("twitter.com", "x.com"),
+        "text": title or summary or "Nouveau tweet",
+        "published_at": published_at,
+        "author": handle,
+    }
+
+
+def _select_newest(tweets: list[dict], since_value: int | None, limit: int | None) -> list[dict]:
+    """
+    Items plus récents que le curseur, du plus récent au plus ancien par ID, au plus `limit`.
+    L'ordre du flux ne suit pas les IDs (tweet épinglé, retweet portant l'ID de l'original) :
+    on filtre numériquement tout le flux (une vingtaine d'items) au lieu de s'arrêter au premier ancien.
+    """
+    if since_value is not None:
+        tweets = [tweet for tweet in tweets if tweet_id_value(tweet["id"]) > since_value]
+    tweets.sort(key=lambda tweet: tweet_id_value(tweet["id"]), reverse=True)
+    return tweets[:limit] if limit is not None else tweets
+
+
+def _parse_feed_fallback(body: bytes, handle: str, since_value: int | None, limit: int | None) -> list[dict] | None:
+    """Analyse tolérante via feedparser, pour les flux que le parseur XML refuse"""
+    tweets = []
+    for entry in feedparser.parse(body).entries:
+        tweet = _make_entry(handle, entry.get("id"), entry.get("link"), entry.get("title"),
+                            entry.get("summary"), entry.get("published"))
+        if tweet:
+            tweets.append(tweet)
+    return _select_newest(tweets, since_value, limit) if tweets else None
+
+
+def parse_feed(body: bytes, handle: str, since_id: str | None = None, limit: int | None = None) -> list[dict] | None:
+    """
+    Analyse incrémentale d'un flux RSS Nitter.
+    Retourne les items plus récents que `since_id` (comparaison numérique), au plus les `limit`
+    plus récents, du plus récent au plus ancien ; None si le flux ne contient aucun tweet.
+    Tout le flux est lu (l'ordre des items ne suit pas les IDs) ; feedparser ne sert de repli
+    que pour les documents que le parseur XML refuse.
+    """
+    since_value = tweet_id_value(since_id) if since_id is not None else None
+    parser = ET.XMLPullParser(events=("end",))
+    tweets = []
+    fields = {}
+    try:
+        for offset in range(0, len(body), PARSE_CHUNK_SIZE):
+            parser.feed(body[offset:offset + PARSE_CHUNK_SIZE])
+            for _, elem in parser.read_events():
+                if elem.tag == "item":
+                    tweet = _make_entry(handle, fields.get("guid"), fields.get("link"), fields.get("title"),
+                                        fields.get("description"), fields.get("pubDate"))
+                    fields = {}
+                    elem.clear()
+                    if tweet:
+                        tweets.append(tweet)
+                elif elem.tag in ("guid", "link", "title", "description", "pubDate"):
+                    fields[elem.tag] = (elem.text or "").strip()
+        parser.close()
+    except ET.ParseError:
+        return _parse_feed_fallback(body, handle, since_value, limit)
+
+    if not tweets:
+        # Document bien formé sans item : feedparser n'en trouverait pas davantage
+        return None
+    return _select_newest(tweets, since_value, limit)
+
+
+# ------------------------------------------------------------------
+# Tweets déjà annoncés
+# ------------------------------------------------------------------
+
+class SeenSet:
+    """
+    IDs déjà annoncés pour un compte, en mémoire bornée : une LRU exacte des IDs
+    récents, doublée de deux générations de filtre de Bloom. Quand la génération
+    courante est pleine, elle remplace la précédente, ce qui garde le taux de faux
+    positifs constant. Un ID supérieur à tous ceux déjà vus est forcément nouveau :
+    les faux positifs ne peuvent donc pas masquer un vrai nouveau tweet.
+    """
+
+    def __init__(self, recent: list[str] | None = None, current: bytes | None = None,
+                 previous: bytes | None = None, count: int = 0, max_id: str | None = None):
+        self.recent = OrderedDict.fromkeys(recent or [])
+        self.current = bytearray(current) if current else bytearray(SEEN_BLOOM_BITS // 8)
+        self.previous = bytearray(previous) if previous else bytearray(SEEN_BLOOM_BITS // 8)
+        self.count = count  # insertions dans la génération courante
+        self.max_id = max_id
+
+    @staticmethod
+    def _positions(tweet_id: str, bits: int) -> list[int]:
+        digest = hashlib.blake2b(tweet_id.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % bits for i in range(SEEN_BLOOM_HASHES)]
+
+    @staticmethod
+    def _bloom_contains(bloom: bytearray, positions: list[int]) -> bool:
+        return all(bloom[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+    def __contains__(self, tweet_id: str) -> bool:
+        if tweet_id_value(tweet_id) > tweet_id_value(self.max_id):
+            return False
+        if tweet_id in self.recent:
+            return True
+        positions = self._positions(tweet_id, len(self.current) * 8)
+        return self._bloom_contains(self.current, positions) or self._bloom_contains(self.previous, positions)
+
+    def add(self, tweet_id: str):
+        if tweet_id_value(tweet_id) > tweet_id_value(self.max_id):
+            self.max_id = tweet_id
+        self.recent[tweet_id] = None
+        self.recent.move_to_end(tweet_id)
+        while len(self.recent) > SEEN_LRU_SIZE:
+            self.recent.popitem(last=False)
+
+        if self.count >= SEEN_BLOOM_CAPACITY:
+            self.previous, self.current = self.current, bytearray(len(self.current))
+            self.count = 0
+        for pos in self._positions(tweet_id, len(self.current) * 8):
+            self.current[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+# ------------------------------------------------------------------
+# Filtres par mots-clés
+# ------------------------------------------------------------------
+
+REGEX_PREFIX = "re:"
+_BACKREFERENCE_RE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=")
+
+
+def split_keywords(value: str) -> list[str]:
+    """
+    Découpe une liste de filtres séparés par des virgules. Dans une entrée `re:`, les virgules
+    entre parenthèses, accolades (quantificateurs `{1,2}`) ou crochets, ou échappées (`\\,`),
+    font partie de l'expression.
+    """
+    keywords = []
+    current = ""
+    depth = 0           # parenthèses et accolades ouvertes
+    in_class = False    # dans une classe de caractères [...]
+    escaped = False
+    for char in value:
+        regex = current.lstrip().startswith(REGEX_PREFIX)
+        if char == "," and not (regex and (depth or in_class or escaped)):
+            keywords.append(current.strip())
+            current, depth, in_class, escaped = "", 0, False, False
+            continue
+        current += char
+        if not regex or escaped:
+            escaped = False
+            continue
+        if char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char in "({":
+            depth += 1
+        elif char in ")}":
+            depth = max(0, depth - 1)
+    keywords.append(current.strip())
+    return [keyword for keyword in keywords if keyword]
+
+
+def validate_keyword_regex(source: str) -> str | None:
+    """Message d'erreur si l'expression régulière d'un filtre est invalide, None sinon"""
+    try:
+        re.compile(source, re.IGNORECASE)
+    except re.error as e:
+        return str(e)
+    return None
+
+
+def _combinable_regex(source: str, compiled: re.Pattern) -> bool:
+    """
+    Vrai si la regex garde son sens dans la regex combinée : pas de drapeaux globaux
+    (hors tête de motif), de références arrière ni de groupes nommés (décalés ou en conflit).
+    On valide le fragment exact qui sera assemblé.
+    """
+    if compiled.groupindex or _BACKREFERENCE_RE.search(source):
+        return False
+    try:
+        re.compile(f"(?=(?P<p0>{source}))?", re.IGNORECASE)
+    except re.error:
+        return False
+    return True
+
+
+class AhoCorasick:
+    """Automate d'Aho-Corasick : trouve tous les mots-clés d'un texte en une seule passe"""
+
+    def __init__(self, keywords: dict[str, set]):
+        self._goto = [{}]       # transitions de chaque état
+        self._fail = [0]        # liens d'échec
+        self._out = [set()]     # clés des mots-clés reconnus dans chaque état
+
+        for keyword, keys in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = next_state
+            self._out[state] |= keys
+
+        # Liens d'échec en largeur
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] |= self._out[self._fail[next_state]]
+
+    def search(self, text: str) -> set:
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._out[state]:
+                found |= self._out[state]
+        return found
+
+
+class KeywordMatcher:
+    """
+    Filtres de tous les serveurs abonnés à un compte, compilés ensemble :
+    les mots-clés littéraux dans un automate d'Aho-Corasick, les expressions
+    régulières (préfixe `re:`) dans une seule regex combinée.
+    `match` retourne les clés (guild_id, "include" | "exclude") reconnues.
+    """
+
+    def __init__(self, filters: dict[tuple, list[str]]):
+        keywords = {}
+        combined = []           # [(source, clé)] assemblées dans la regex unique
+        self._separate = []     # [(regex, clé)] testées une à une
+        for key, patterns in filters.items():
+            for pattern in patterns:
+                if pattern.startswith(REGEX_PREFIX):
+                    source = pattern[len(REGEX_PREFIX):]
+                    try:
+                        compiled = re.compile(source, re.IGNORECASE)
+                    except re.error as e:
+                        # Seul le filtre fautif est ignoré, pas ceux des autres serveurs
+                        logger.warning(f"Regex ignorée pour le serveur {key[0]} `{source}`: {e}")
+                        continue
+                    if _combinable_regex(source, compiled):
+                        combined.append((source, key))
+                    else:
+                        self._separate.append((compiled, key))
+                elif pattern:
+                    keywords.setdefault(pattern.lower(), set()).add(key)
+
+        self._automaton = AhoCorasick(keywords) if keywords else None
+        self._regex_keys = [key for _, key in combined]
+        self._regex = None
+        if combined:
+            try:
+                self._regex = re.compile(
+                    "".join(f"(?=(?P<p{index}>{source}))?" for index, (source, _) in enumerate(combined)),
+                    re.IGNORECASE,
+                )
+            except re.error as e:
+                logger.warning(f"Regex combinée invalide, regex testées séparément: {e}")
+                self._separate += [(re.compile(source, re.IGNORECASE), key) for source, key in combined]
+
+    def match(self, text: str) -> set:
+        found = self._automaton.search(text.lower()) if self._automaton else set()
+        if self._regex:
+            # Lookaheads optionnels : chaque position teste toutes les regex en une passe
+            for match in self._regex.finditer(text):
+                for name, value in match.groupdict().items():
+                    if value is not None:
+                        found.add(self._regex_keys[int(name[1:])])
+        for regex, key in self._separate:
+            if key not in found and regex.search(text):
+                found.add(key)
+        return found
+
+
+# ------------------------------------------------------------------
+# Registre des abonnements
+# ------------------------------------------------------------------
+
+class Subscription:
+    """Abonnement d'un canal à un compte, avec son curseur de livraison"""
+
+    __slots__ = ("guild_id", "channel_id", "handle_id", "cursor")
+
+    def __init__(self, guild_id: int, channel_id: int, handle_id: int):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.handle_id = handle_id
+        self.cursor: str | None = None
+
+
+class SubscriptionRegistry:
+    """
+    Abonnements en mémoire, indexés par compte, par canal et par serveur.
+    Chaque compte est interné une seule fois et référencé par un identifiant entier ;
+    les compteurs par serveur sont tenus à jour à chaque ajout ou retrait.
+    """
+
+    def __init__(self):
+        self._handle_ids = {}    # {compte: identifiant}
+        self._handles = []       # [compte ou None], indexé par identifiant
+        self._free_ids = []      # identifiants libérés, réutilisés
+        self._by_handle = {}     # {identifiant: {Subscription}}
+        self._by_channel = {}    # {channel_id: {identifiant: Subscription}}, dans l'ordre d'ajout
+        self._by_guild = {}      # {guild_id: {channel_id: nombre d'abonnements}}
+        self._guild_totals = {}  # {guild_id: nombre d'abonnements}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._handle_ids
+
+    def __iter__(self):
+        for subscriptions in self._by_handle.values():
+            yield from subscriptions
+
+    @property
+    def handle_count(self) -> int:
+        return len(self._handle_ids)
+
+    def handles(self) -> list[str]:
+        return list(self._handle_ids)
+
+    def handle(self, subscription: Subscription) -> str:
+        return self._handles[subscription.handle_id]
+
+    def get(self, guild_id: int, channel_id: int, handle: str) -> Subscription | None:
+        handle_id = self._handle_ids.get(handle)
+        subscription = self._by_channel.get(channel_id, {}).get(handle_id)
+        return subscription if subscription is not None and subscription.guild_id == guild_id else None
+
+    def add(self, guild_id: int, channel_id: int, handle: str) -> Subscription | None:
+        """Ajoute un abonnement ; None s'il existe déjà"""
+        handle_id = self._handle_ids.get(handle)
+        if handle_id is None:
+            handle = sys.intern(handle)
+            if self._free_ids:
+                handle_id = self._free_ids.pop()
+                self._handles[handle_id] = handle
+            else:
+                handle_id = len(self._handles)
+                self._handles.append(handle)
+            self._handle_ids[handle] = handle_id
+            self._by_handle[handle_id] = set()
+
+        channel = self._by_channel.setdefault(channel_id, {})
+        if handle_id in channel:
+            return None
+
+        subscription = channel[handle_id] = Subscription(guild_id, channel_id, handle_id)
+        self._by_handle[handle_id].add(subscription)
+        channels = self._by_guild.setdefault(guild_id, {})
+        channels[channel_id] = channels.get(channel_id, 0) + 1
+        self._guild_totals[guild_id] = self._guild_totals.get(guild_id, 0) + 1
+        self._count += 1
+        return subscription
+
+    def remove(self, guild_id: int, channel_id: int, handle: str) -> Subscription | None:
+        """Retire un abonnement ; le compte est libéré avec son dernier abonné"""
+        subscription = self.get(guild_id, channel_id, handle)
+        if subscription is None:
+            return None
+
+        channel = self._by_channel[channel_id]
+        del channel[subscription.handle_id]
+        if not channel:
+            del self._by_channel[channel_id]
+        channels = self._by_guild[guild_id]
+        channels[channel_id] -= 1
+        if not channels[channel_id]:
+            del channels[channel_id]
+        if not channels:
+            del self._by_guild[guild_id]
+        self._guild_totals[guild_id] -= 1
+        if not self._guild_totals[guild_id]:
+            del self._guild_totals[guild_id]
+        self._count -= 1
+
+        subscriptions = self._by_handle[subscription.handle_id]
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._by_handle[subscription.handle_id]
+            del self._handle_ids[handle]
+            self._handles[subscription.handle_id] = None
+            self._free_ids.append(subscription.handle_id)
+        return subscription
+
+    # Requêtes par index
+
+    def for_handle(self, handle: str) -> set[Subscription]:
+        return self._by_handle.get(self._handle_ids.get(handle), set())
+
+    def guild_ids(self, handle: str) -> set[int]:
+        """Serveurs abonnés à un compte"""
+        return {subscription.guild_id for subscription in self.for_handle(handle)}
+
+    def channel_handles(self, channel_id: int) -> list[str]:
+        return [self._handles[handle_id] for handle_id in self._by_channel.get(channel_id, ())]
+
+    def channel_guild(self, channel_id: int) -> int | None:
+        channel = self._by_channel.get(channel_id)
+        return next(iter(channel.values())).guild_id if channel else None
+
+    def guild_channels(self, guild_id: int) -> list[int]:
+        return list(self._by_guild.get(guild_id, ()))
+
+    def guild_handles(self, guild_id: int) -> set[str]:
+        return {handle for channel_id in self._by_guild.get(guild_id, ()) for handle in self.channel_handles(channel_id)}
+
+    def guild_counts(self, guild_id: int) -> tuple[int, int]:
+        """(abonnements, canaux) d'un serveur, en temps constant"""
+        return self._guild_totals.get(guild_id, 0), len(self._by_guild.get(guild_id, ()))
+
+
+# ------------------------------------------------------------------
+# Stockage persistant
+# ------------------------------------------------------------------
+
+class StateStore:
+    """
+    État durable du bot dans SQLite (mode WAL).
+    Les mutations sont mises en attente en mémoire, fusionnées par clé,
+    puis écrites en une seule transaction à chaque flush.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            handle TEXT NOT NULL,
+            PRIMARY KEY (guild_id, channel_id, handle)
+        );
+        CREATE TABLE IF NOT EXISTS cursors (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            handle TEXT NOT NULL,
+            tweet_id TEXT NOT NULL,
+            PRIMARY KEY (guild_id, channel_id, handle)
+        );
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS handle_checks (
+            handle TEXT PRIMARY KEY,
+            checked_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS posting_stats (
+            handle TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS seen_ids (
+            handle TEXT PRIMARY KEY,
+            recent TEXT NOT NULL,
+            current BLOB NOT NULL,
+            previous BLOB NOT NULL,
+            count INTEGER NOT NULL,
+            max_id TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tweets (
+            id TEXT PRIMARY KEY,
+            handle TEXT NOT NULL,
+            url TEXT NOT NULL,
+            text TEXT NOT NULL,
+            published_at TEXT,
+            archived_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tweets_archived_at ON tweets (archived_at);
+    """
+
+    # Index plein texte synchronisé par triggers (table à contenu externe)
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+            text, handle UNINDEXED, content='tweets', tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweets BEGIN
+            INSERT INTO tweets_fts (rowid, text, handle) VALUES (new.rowid, new.text, new.handle);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweets BEGIN
+            INSERT INTO tweets_fts (tweets_fts, rowid, text, handle) VALUES ('delete', old.rowid, old.text, old.handle);
+        END;
+    """
+
+    KEY_COLUMNS = {
+        "subscriptions": ("guild_id", "channel_id", "handle"),
+        "cursors": ("guild_id", "channel_id", "handle"),
+        "guild_settings": ("guild_id",),
+        "handle_checks": ("handle",),
+        "posting_stats": ("handle",),
+        "seen_ids": ("handle",),
+        "tweets": ("id",),
+    }
+
+    # Les tweets archivés ne sont jamais réécrits (un REPLACE désynchroniserait l'index plein texte)
+    INSERT_MODES = {"tweets": "INSERT OR IGNORE"}
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._pending = {}  # {(table, key...): row ou None pour une suppression}
+        self._flush_lock = asyncio.Lock()
+        self.fts_enabled = False
+
+    def open(self):
+        # Plusieurs workers peuvent partager la base : attendre le verrou d'écriture plutôt qu'échouer
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        try:
+            self._conn.executescript(self.FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 indisponible, recherche par LIKE: {e}")
+
+    def load(self) -> dict:
+        """Charge tout l'état en une passe (une requête par table)"""
+        shared = self.load_shared()
+        last_checks = {
+            handle: datetime.fromisoformat(checked_at)
+            for handle, checked_at in self._conn.execute("SELECT handle, checked_at FROM handle_checks")
+        }
+        posting_stats = {
+            handle: json.loads(data)
+            for handle, data in self._conn.execute("SELECT handle, data FROM posting_stats")
+        }
+        seen_ids = {
+            handle: SeenSet(json.loads(recent), current, previous, count, max_id)
+            for handle, recent, current, previous, count, max_id
+            in self._conn.execute("SELECT handle, recent, current, previous, count, max_id FROM seen_ids")
+        }
+        return {
+            **shared,
+            "last_checks": last_checks,
+            "posting_stats": posting_stats,
+            "seen_ids": seen_ids,
+        }
+
+    def load_shared(self) -> dict:
+        """Abonnements (avec curseurs) et paramètres, relus périodiquement par les workers"""
+        subscriptions = self._conn.execute("""
+            SELECT s.guild_id, s.channel_id, s.handle, c.tweet_id
+            FROM subscriptions s
+            LEFT JOIN cursors c USING (guild_id, channel_id, handle)
+        """).fetchall()
+        settings = {
+            guild_id: json.loads(data)
+            for guild_id, data in self._conn.execute("SELECT guild_id, data FROM guild_settings")
+        }
+        return {"subscriptions": subscriptions, "guild_settings": settings}
+
+    # Mutations différées
+
+    def put_subscription(self, guild_id: int, chan_id: int, handle: str):
+        self._pending[("subscriptions", guild_id, chan_id, handle)] = (guild_id, chan_id, handle)
+
+    def delete_subscription(self, guild_id: int, chan_id: int, handle: str):
+        self._pending[("subscriptions", guild_id, chan_id, handle)] = None
+        self._pending[("cursors", guild_id, chan_id, handle)] = None
+
+    def put_cursor(self, guild_id: int, chan_id: int, handle: str, tweet_id: str):
+        self._pending[("cursors", guild_id, chan_id, handle)] = (guild_id, chan_id, handle, tweet_id)
+
+    def put_settings(self, guild_id: int, settings: dict):
+        self._pending[("guild_settings", guild_id)] = (guild_id, json.dumps(settings))
+
+    def put_last_check(self, handle: str, checked_at: datetime):
+        self._pending[("handle_checks", handle)] = (handle, checked_at.isoformat())
+
+    def put_posting_stats(self, handle: str, stats: dict):
+        self._pending[("posting_stats", handle)] = (handle, json.dumps(stats))
+
+    def put_seen(self, handle: str, seen: SeenSet):
+        self._pending[("seen_ids", handle)] = (
+            handle, json.dumps(list(seen.recent)), bytes(seen.current), bytes(seen.previous), seen.count, seen.max_id
+        )
+
+    async def read_shared(self) -> dict:
+        """Écrit les mutations locales puis relit l'état partagé, sans croiser une écriture en cours"""
+        await self.flush()
+        async with self._flush_lock:
+            return await self._run_in_thread(self.load_shared)
+
+    def put_tweets(self, handle: str, tweets: list[dict]):
+        archived_at = time.time()
+        for tweet in tweets:
+            published = tweet.get("published_at")
+            self._pending[("tweets", tweet["id"])] = (
+                tweet["id"], handle, tweet["url"], tweet["text"],
+                published.isoformat() if published else None, archived_at,
+            )
+
+    def is_pending(self, table: str, *key) -> bool:
+        """Vrai si une mutation locale de cette ligne n'est pas encore écrite"""
+        return (table, *key) in self._pending
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def flush(self):
+        """Écrit les mutations en attente dans une seule transaction, hors de la boucle d'événements"""
+        async with self._flush_lock:
+            if not self._pending or self._conn is None:
+                return
+            batch, self._pending = self._pending, {}
+            write = asyncio.ensure_future(asyncio.to_thread(self._write_batch, batch))
+            try:
+                await self._wait_thread(write)
+            except BaseException:
+                # Écriture échouée ou issue inconnue (annulation répétée) : remettre le lot
+                # en attente sans écraser les mutations plus récentes ; le réécrire est sans effet
+                if not write.done() or write.cancelled() or write.exception() is not None:
+                    self._pending = {**batch, **self._pending}
+                raise
+
+    async def _run_in_thread(self, func, *args):
+        return await self._wait_thread(asyncio.ensure_future(asyncio.to_thread(func, *args)))
+
+    @staticmethod
+    async def _wait_thread(work: asyncio.Future):
+        """
+        Attend un travail lancé dans un thread. Un thread n'est pas interruptible :
+        en cas d'annulation, on attend tout de même sa fin pour ne rendre le verrou
+        (et la connexion) qu'une fois la transaction terminée.
+        """
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            if not work.done():
+                await asyncio.wait([work])
+            raise
+
+    def _write_batch(self, batch: dict):
+        upserts = {}
+        deletes = {}
+        for key, row in batch.items():
+            table = key[0]
+            if row is None:
+                deletes.setdefault(table, []).append(key[1:])
+            else:
+                upserts.setdefault(table, []).append(row)
+
+        with self._conn:
+            self._conn.execute("BEGIN")
+            for table, keys in deletes.items():
+                columns = " AND ".join(f"{column} = ?" for column in self.KEY_COLUMNS[table])
+                self._conn.executemany(f"DELETE FROM {table} WHERE {columns}", keys)
+            for table, rows in upserts.items():
+                placeholders = ", ".join("?" * len(rows[0]))
+                insert = self.INSERT_MODES.get(table, "INSERT OR REPLACE")
+                self._conn.executemany(f"{insert} INTO {table} VALUES ({placeholders})", rows)
+
+    # Archive des tweets
+
+    async def search_tweets(self, query: str, handle: str | None = None, limit: int = SEARCH_MAX_RESULTS) -> list[tuple]:
+        """Tweets archivés correspondant à tous les mots de la requête, les plus pertinents d'abord"""
+        async with self._flush_lock:
+            return await self._run_in_thread(self._search_tweets, query, handle, limit)
+
+    def _search_tweets(self, query: str, handle: str | None, limit: int) -> list[tuple]:
+        words = query.split()
+        handle_filter = "AND t.handle = ? COLLATE NOCASE" if handle else ""
+        handle_params = [handle] if handle else []
+
+        if self.fts_enabled:
+            # Chaque mot entre guillemets : la syntaxe FTS5 de l'utilisateur n'est pas interprétée
+            match = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+            return self._conn.execute(f"""
+                SELECT t.handle, t.url, t.published_at, snippet(tweets_fts, 0, '**', '**', '…', 16)
+                FROM tweets_fts JOIN tweets t ON t.rowid = tweets_fts.rowid
+                WHERE tweets_fts MATCH ? {handle_filter}
+                ORDER BY bm25(tweets_fts), t.archived_at DESC
+                LIMIT ?
+            """, [match, *handle_params, limit]).fetchall()
+
+        conditions = " AND ".join("t.text LIKE ?" for _ in words)
+        return self._conn.execute(f"""
+            SELECT t.handle, t.url, t.published_at, substr(t.text, 1, 200)
+            FROM tweets t
+            WHERE {conditions} {handle_filter}
+            ORDER BY t.archived_at DESC
+            LIMIT ?
+        """, [*(f"%{word}%" for word in words), *handle_params, limit]).fetchall()
+
+    async def prune_tweets(self, max_age: float, max_rows: int) -> int:
+        """Applique la rétention de l'archive ; retourne le nombre de tweets supprimés"""
+        async with self._flush_lock:
+            return await self._run_in_thread(self._prune_tweets, max_age, max_rows)
+
+    def _prune_tweets(self, max_age: float, max_rows: int) -> int:
+        with self._conn:
+            self._conn.execute("BEGIN")
+            deleted = self._conn.execute("DELETE FROM tweets WHERE archived_at < ?", (time.time() - max_age,)).rowcount
+            deleted += self._conn.execute("""
+                DELETE FROM tweets WHERE rowid IN (
+                    SELECT rowid FROM tweets ORDER BY archived_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_rows,)).rowcount
+            if deleted and self.fts_enabled:
+                self._conn.execute("INSERT INTO tweets_fts (tweets_fts) VALUES ('optimize')")
+        return deleted
+
+    async def close(self):
+        """Attend l'écriture en cours, écrit les mutations restantes puis ferme la base"""
+        async with self._flush_lock:
+            if self._conn is None:
+                return
+            batch, self._pending = self._pending, {}
+            await self._run_in_thread(self._close, batch)
+
+    def _close(self, batch: dict):
+        try:
+            if batch:
+                self._write_batch(batch)
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+# ------------------------------------------------------------------
+# Échéancier
+# ------------------------------------------------------------------
+
+class PollScheduler:
+    """
+    Tas binaire d'échéances (next_due, account) sur l'horloge monotone.
+    Une seule échéance est valide par compte : les entrées périmées du tas
+    sont ignorées lorsqu'elles remontent au sommet (suppression paresseuse).
+    """
+
+    def __init__(self):
+        self._heap = []         # [(due, seq, account)]
+        self._due = {}          # {account: due}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.last_lag = 0.0     # retard de la dernière échéance traitée, en secondes
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._due
+
+    def schedule(self, handle: str, due: float):
+        """Programme (ou reprogramme) un compte, en O(log n)"""
+        wake = not self._heap or due < self._heap[0][0]
+        self._due[handle] = due
+        heapq.heappush(self._heap, (due, next(self._seq), handle))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._compact()
+        if wake:
+            self._wakeup.set()
+
+    def unschedule(self, handle: str):
+        self._due.pop(handle, None)
+
+    def due_at(self, handle: str) -> float | None:
+        return self._due.get(handle)
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due, _, handle = self._heap[0]
+            if self._due.get(handle) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> list[str]:
+        """Retire et retourne les comptes dont l'échéance est passée"""
+        handles = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, _, handle = heapq.heappop(self._heap)
+            del self._due[handle]
+            if not handles:
+                self.last_lag = now - due
+            handles.append(handle)
+        return handles
+
+    async def wait(self):
+        """Dort jusqu'à la prochaine échéance, ou jusqu'à ce qu'une échéance plus proche soit programmée"""
+        self._wakeup.clear()
+        due = self.next_due()
+        timeout = None if due is None else max(0.0, due - time.monotonic())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _compact(self):
+        self._heap = [(due, next(self._seq), handle) for handle, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+
+class PostingStats:
+    """
+    Rythme de publication observé d'un compte : dates des dernières publications
+    et répartition par heure (UTC), pour adapter la fréquence de vérification.
+    """
+
+    def __init__(self, timestamps: list[float] | None = None, hourly: list[float] | None = None):
+        self.timestamps = deque(sorted(timestamps or []), maxlen=ADAPTIVE_HISTORY)
+        self.hourly = list(hourly) if hourly else [0.0] * 24
+
+    def record(self, published_at: datetime) -> bool:
+        """Enregistre une publication ; retourne False si elle est déjà connue"""
+        timestamp = published_at.timestamp()
+        if self.timestamps and timestamp <= self.timestamps[-1]:
+            return False
+
+        self.timestamps.append(timestamp)
+        self.hourly[datetime.utcfromtimestamp(timestamp).hour] += 1
+        if sum(self.hourly) > 200:
+            # Amortir l'historique pour suivre les changements d'habitudes
+            self.hourly = [count / 2 for count in self.hourly]
+        return True
+
+    def interval(self, now: float, base: float, minimum: float, maximum: float) -> float:
+        """Intervalle conseillé à l'instant `now` (epoch), borné par [minimum, maximum]"""
+        if len(self.timestamps) < 3:
+            return min(max(base, minimum), maximum)
+
+        since_last = now - self.timestamps[-1]
+        if since_last < ADAPTIVE_BURST_WINDOW:
+            # Les annonces arrivent souvent en série
+            return minimum
+
+        gaps = sorted(b - a for a, b in itertools.pairwise(self.timestamps))
+        median_gap = max(gaps[len(gaps) // 2], 1.0)
+        target = median_gap / ADAPTIVE_TARGET_FRACTION
+
+        # Plus souvent pendant les heures actives, moins souvent la nuit du compte
+        # (lissage de Laplace pour ne pas sur-réagir à un historique court)
+        hour = datetime.utcfromtimestamp(now).hour
+        share = (self.hourly[hour] + 1) * 24 / (sum(self.hourly) + 24)
+        target /= min(max(share, 0.25), 4.0)
+
+        # Long silence : on espace progressivement
+        if since_last > 2 * median_gap:
+            target *= since_last / (2 * median_gap)
+
+        return min(max(target, minimum), maximum)
+
+    def to_dict(self) -> dict:
+        return {"timestamps": list(self.timestamps), "hourly": self.hourly}
+
+
+# ------------------------------------------------------------------
+# File d'envoi
+# ------------------------------------------------------------------
+
+class DeliveryPipeline:
+    """
+    Une file et un worker par canal : les envois d'un canal sont sérialisés
+    (Discord limite les messages par canal), les tweets en attente sont
+    regroupés dans un même message, et un sémaphore borne les canaux servis
+    en parallèle. La récupération des flux n'attend jamais l'envoi.
+    """
+
+    def __init__(self, send_batch):
+        self._send_batch = send_batch   # coroutine (channel_id, [(account, tweet)]) -> bool (envoyé)
+        self._queues = {}               # {channel_id: asyncio.Queue}
+        self._workers = {}              # {channel_id: asyncio.Task}
+        self._semaphore = asyncio.Semaphore(DELIVERY_CONCURRENCY)
+        self.depth = 0                  # tweets en attente, tous canaux confondus
+        self.in_flight = 0              # tweets en cours d'envoi
+        self.sent = 0                   # messages envoyés
+        self.failed = 0                 # messages en échec (canal introuvable, permissions, erreur HTTP)
+        self.last_lag = 0.0             # délai entre mise en file et envoi, en secondes
+        self.max_lag = 0.0
+
+    def enqueue(self, chan_id: int, handle: str, tweet: dict):
+        queue = self._queues.get(chan_id)
+        if queue is None:
+            queue = self._queues[chan_id] = asyncio.Queue()
+            self._workers[chan_id] = asyncio.create_task(self._worker(chan_id, queue))
+        queue.put_nowait((time.monotonic(), handle, tweet))
+        self.depth += 1
+
+    async def _worker(self, chan_id: int, queue: asyncio.Queue):
+        while True:
+            try:
+                first = await asyncio.wait_for(queue.get(), DELIVERY_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    del self._queues[chan_id]
+                    del self._workers[chan_id]
+                    return
+                continue
+
+            # Regrouper ce qui s'est accumulé pendant l'envoi précédent
+            items = [first]
+            while len(items) < DELIVERY_MAX_BATCH and not queue.empty():
+                items.append(queue.get_nowait())
+            self.depth -= len(items)
+            self.in_flight += len(items)
+            try:
+                delivered = await self._deliver(chan_id, [(handle, tweet) for _, handle, tweet in items])
+            finally:
+                self.in_flight -= len(items)
+
+            if not delivered:
+                self.failed += 1
+                NOTIFICATIONS_FAILED.inc(len(items))
+                continue
+
+            self.sent += 1
+            NOTIFICATIONS_SENT.inc(len(items))
+            self.last_lag = time.monotonic() - items[0][0]
+            self.max_lag = max(self.max_lag, self.last_lag)
+            DELIVERY_LAG.observe(self.last_lag)
+
+    async def _deliver(self, chan_id: int, batch: list[tuple[str, dict]]) -> bool:
+        """
+        Envoie un lot en réessayant les erreurs transitoires (exceptions) avec un délai croissant.
+        Un refus définitif (send_batch retourne False) n'est pas réessayé.
+        """
+        for attempt in range(1, DELIVERY_MAX_ATTEMPTS + 1):
+            async with self._semaphore:
+                try:
+                    return await self._send_batch(chan_id, batch)
+                except Exception as e:
+                    logger.warning(f"Envoi dans le canal {chan_id} échoué ({attempt}/{DELIVERY_MAX_ATTEMPTS}): {e}")
+            if attempt < DELIVERY_MAX_ATTEMPTS:
+                await asyncio.sleep(DELIVERY_RETRY_DELAY * 2 ** (attempt - 1))
+        logger.error(f"Abandon de l'envoi de {len(batch)} tweet(s) dans le canal {chan_id}")
+        return False
+
+    async def drain(self, timeout: float):
+        """Laisse les workers vider les files (arrêt propre), puis les arrête"""
+        deadline = time.monotonic() + timeout
+        while (self.depth or self.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.depth or self.in_flight:
+            logger.warning(f"Arrêt : {self.depth + self.in_flight} tweet(s) non envoyé(s) après {timeout:.0f}s")
+        self.stop()
+
+    def stop(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._queues.clear()
+        self.depth = 0
+
+
+# ------------------------------------------------------------------
+# Import groupé
+# ------------------------------------------------------------------
+
+HANDLE_RE = re.compile(r"^[A-Za-z0-9_]{1,15}$")
+
+
+def parse_import_file(filename: str, data: bytes) -> list[tuple[str, str | None]]:
+    """
+    Lit une liste d'abonnements depuis une pièce jointe.
+    JSON : ["compte", ...] ou [{"handle": "compte", "channel": "#canal"}, ...]
+    CSV : une ligne par compte, canal facultatif en seconde colonne (en-tête "handle,channel" accepté)
+    Retourne des paires (compte, canal ou None).
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json") or text.lstrip().startswith(("[", "{")):
+        items = json.loads(text)
+        if isinstance(items, dict):
+            items = items.get("handles") or items.get("accounts") or []
+        if not isinstance(items, list):
+            raise ValueError("le JSON doit être une liste de comptes")
+        entries = []
+        for item in items:
+            if isinstance(item, str):
+                entries.append((item, None))
+            elif isinstance(item, dict) and item.get("handle"):
+                entries.append((str(item["handle"]), item.get("channel") and str(item["channel"])))
+        return entries
+
+    entries = []
+    for row in csv.reader(io.StringIO(text)):
+        cells = [cell.strip() for cell in row]
+        if not cells or not cells[0] or cells[0].lower() in ("handle", "compte", "account"):
+            continue
+        entries.append((cells[0], cells[1] if len(cells) > 1 and cells[1] else None))
+    return entries
+
+
+# ------------------------------------------------------------------
+# Répartition des comptes entre workers
+# ------------------------------------------------------------------
+
+class HashRing:
+    """
+    Anneau de hachage cohérent : chaque compte appartient à un seul worker,
+    et ajouter un worker ne déplace qu'environ 1/N des comptes.
+    """
+
+    def __init__(self, nodes: int, replicas: int = HASH_RING_REPLICAS):
+        points = sorted(
+            (self._hash(f"worker-{node}:{replica}"), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._keys = [key for key, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def owner(self, handle: str) -> int:
+        index = bisect.bisect(self._keys, self._hash(handle.lower())) % len(self._keys)
+        return self._nodes[index]
+
+
+def shard_options() -> dict:
+    """Arguments d'AutoShardedBot selon SHARD_COUNT et SHARD_IDS"""
+    if SHARD_COUNT is None:
+        return {}
+    auto = SHARD_COUNT.lower() == "auto"
+    if auto and SHARD_IDS:
+        raise RuntimeError("SHARD_IDS exige un SHARD_COUNT explicite (incompatible avec SHARD_COUNT=auto).")
+    options = {"shard_count": None if auto else int(SHARD_COUNT)}
+    if SHARD_IDS:
+        options["shard_ids"] = SHARD_IDS
+    return options
+
+
+BotBase = commands.AutoShardedBot if SHARD_COUNT is not None else commands.Bot
+
+
+class TwitterMonitorBot(BotBase):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
-        super().__init__(command_prefix="!ww ", intents=intents, help_command=None)
+        super().__init__(command_prefix="!ww ", intents=intents, help_command=None, **shard_options())
+
+        # Stockage en mémoire (adapté pour Render)
+        self.subscriptions = SubscriptionRegistry()   # abonnements et curseurs, indexés par compte/canal/serveur
+        self.guild_settings = {}      # {guild_id: settings}
+        
+        # Horodatage de la dernière récupération de chaque compte (!ww status)
+        self._last_check = {}
+
+        # Session HTTP partagée, créée dans setup_hook et fermée dans close
+        self.http_session: aiohttp.ClientSession | None = None
+
+        # Limites de concurrence du moteur de récupération
+        self._poll_semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+        self.last_tick_duration = None  # durée du dernier lot de comptes, en secondes
+        self._hedge_budget = HEDGE_BUDGET_PER_MINUTE
+        self._hedge_window_start = time.monotonic()
+        self.hedged_requests = 0
+
+        # Partition des comptes : ce processus ne récupère que ceux qui lui reviennent
+        self.hash_ring = HashRing(WORKER_COUNT)
+
+        # Échéancier par compte
+        self.scheduler = PollScheduler()
+        self._polling = set()       # comptes en cours de récupération
+        self._batches = set()       # lots en cours (références fortes sur les tâches)
+        self.posting_stats = {}     # {account: PostingStats}
+        self.seen_ids = {}          # {account: SeenSet}
+        self._keyword_matchers = {} # {account: KeywordMatcher}, reconstruits quand les filtres changent
+
+        # Envoi des notifications, découplé de la récupération
+        self.delivery = DeliveryPipeline(self.deliver_batch)
+
+        # Détection des blocages de la boucle, active avec le profilage
+        self._watchdog: LoopWatchdog | None = None
+
+        # Serveur /metrics et /healthz, démarré dans setup_hook
+        self._web_runner: web.AppRunner | None = None
+        Gauge("ww_delivery_queue_depth", "Tweets en attente d'envoi", read=lambda: self.delivery.depth)
+        Gauge("ww_scheduled_handles", "Comptes programmés dans l'échéancier", read=lambda: len(self.scheduler))
+        Gauge("ww_monitored_handles", "Comptes distincts surveillés", read=lambda: self.subscriptions.handle_count)
+        Gauge("ww_state_pending_writes", "Mutations en attente d'écriture", read=lambda: self.state_store.pending_count)
+
+        # Validateurs HTTP des flux RSS pour les requêtes conditionnelles
+        self._feed_cache = {}  # {(instance, account): {"etag", "last_modified", "hash", "entries", "floor"}}
+
+        # Instances Nitter classées par santé
+        self.instance_pool = NitterInstancePool(NITTER_INSTANCES)
+
+        # Pool d'analyse des flux, créé dans setup_hook
+        self._parse_executor: Executor | None = None
+
+        # Stockage persistant, chargé dans setup_hook
+        self.state_store = StateStore(STATE_DB_PATH)
+        
+        # Comptes officiels Wuthering Waves (pré-configurés)
+        self.official_accounts = {
+            'Wuthering_Waves_Global': 'Compte officiel global',
+            'Narushio_wuwa': 'Développeur Narushio',
+            'WutheringWavesOfficialDiscord': 'Discord officiel'
+        }
+
+    async def setup_hook(self):
+        """Crée la session HTTP partagée avant la connexion au gateway"""
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        self.http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            auto_decompress=True,
+        )
+
+        if PARSE_EXECUTOR == "process":
+            self._parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            self._parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="feed-parser")
+
+        await self.load_state()
+        self.flush_state.start()
+        if WORKER_COUNT > 1:
+            self.sync_subscriptions.start()
+        if ARCHIVE_ENABLED:
+            self.prune_archive.start()
+        if PROFILER.enabled:
+            self.start_watchdog()
+        self.measure_loop_lag.start()
+        await self.start_web_server()
+
+    def start_watchdog(self):
+        """Démarre le watchdog de la boucle d'événements s'il ne tourne pas déjà"""
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = LoopWatchdog(asyncio.get_running_loop(), PROFILER)
+            self._watchdog.start()
+
+    async def start_web_server(self):
+        """Expose /metrics (Prometheus) et /healthz (vérification de santé Render)"""
+        if not METRICS_PORT:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/healthz", self.handle_healthz)
+        self._web_runner = web.AppRunner(app, access_log=None)
+        await self._web_runner.setup()
+        await web.TCPSite(self._web_runner, "0.0.0.0", METRICS_PORT).start()
+        logger.info(f"Métriques exposées sur le port {METRICS_PORT}")
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
 
-        # Stockage en mémoire (adapté pour Render)
-        self.monitored_accounts = {}  # {guild_id: {channel_id: [accounts]}}
-        self.last_tweet_ids = {}      # {account: last_tweet_id}
-        self.guild_settings = {}      # {guild_id: settings}
-        
-        # Dictionnaire d'horodatage pour chaque guild
-        self._last_check = {}
-        
-        # Comptes officiels Wuthering Waves (pré-configurés)
-        self.official_accounts = {
-            'Wuthering_Waves_Global': 'Compte officiel global',
-            'Narushio_wuwa': 'Développeur Narushio',
-            'WutheringWavesOfficialDiscord': 'Discord officiel'
+    async def handle_healthz(self, request: web.Request) -> web.Response:
+        discord_ready = WORKER_MODE == "poller" or self.is_ready()
+        healthy = discord_ready and self.monitor_twitter.is_running()
+        body = {
+            "status": "ok" if healthy else "starting",
+            "discord_ready": discord_ready,
+            "worker": f"{WORKER_ID}/{WORKER_COUNT}",
+            "monitoring": self.monitor_twitter.is_running(),
+            "handles": self.subscriptions.handle_count,
+            "delivery_queue": self.delivery.depth,
         }
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def load_state(self):
+        """Restaure abonnements, curseurs et paramètres depuis le stockage persistant"""
+        started = time.perf_counter()
+        await asyncio.to_thread(self.state_store.open)
+        snapshot = await asyncio.to_thread(self.state_store.load)
+
+        self.guild_settings.update(snapshot["guild_settings"])
+        self._last_check.update(snapshot["last_checks"])
+        self.seen_ids.update(snapshot["seen_ids"])
+        for handle, data in snapshot["posting_stats"].items():
+            self.posting_stats[handle] = PostingStats(data.get("timestamps"), data.get("hourly"))
+        for guild_id, chan_id, handle, last_tweet_id in snapshot["subscriptions"]:
+            subscription = self._index_subscription(guild_id, chan_id, handle)
+            if subscription is not None:
+                subscription.cursor = last_tweet_id
+
+        # Étaler les premières récupérations sur l'intervalle de chaque compte
+        for handle in self.subscriptions.handles():
+            self.ensure_scheduled(handle)
+
+        logger.info(
+            f"État restauré: {len(snapshot['subscriptions'])} abonnement(s), "
+            f"{len(snapshot['guild_settings'])} serveur(s) en {time.perf_counter() - started:.2f}s"
+        )
+
+    async def close(self):
+        """Ferme la session HTTP et le stockage persistant avec le bot"""
+        if self.flush_state.is_running():
+            self.flush_state.cancel()
+        if self.sync_subscriptions.is_running():
+            self.sync_subscriptions.cancel()
+        if self.prune_archive.is_running():
+            self.prune_archive.cancel()
+        if self.measure_loop_lag.is_running():
+            self.measure_loop_lag.cancel()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        if self._web_runner is not None:
+            await self._web_runner.cleanup()
+
+        # Les curseurs avancent à la mise en file : on termine les envois avant l'écriture finale
+        if self.monitor_twitter.is_running():
+            self.monitor_twitter.cancel()
+        for batch in list(self._batches):
+            batch.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        await self.delivery.drain(DELIVERY_DRAIN_TIMEOUT)
+        try:
+            await self.state_store.close()
+        except Exception as e:
+            logger.error(f"Erreur lors de la fermeture du stockage: {e}")
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False, cancel_futures=True)
+        await super().close()
+
+    async def run_poller(self, token: str):
+        """
+        Worker de récupération sans gateway : connexion REST uniquement, pas de commandes.
+        Les notifications partent par des canaux partiels (get_partial_messageable).
+        """
+        async with self:
+            await self.login(token)  # appelle setup_hook
+            logger.info(f"Worker de récupération {WORKER_ID}/{WORKER_COUNT}: {len(self.scheduler)} compte(s)")
+            self.monitor_twitter.start()
+            await self.monitor_twitter.get_task()
 
     async def on_ready(self):
         logger.info(f"{self.user} est connecté!")
@@ -52,8 +1880,13 @@ class TwitterMonitorBot(commands.Bot):
             "notification_role": None,
             "embed_color": 0x00d4ff,  # Couleur Wuthering Waves
             "include_retweets": False,
-            "filter_keywords": []
+            "include_keywords": [],  # mots-clés requis (préfixe "re:" pour une regex)
+            "exclude_keywords": [],  # mots-clés exclus
+            "adaptive": False,  # Fréquence adaptée au rythme de publication
+            "min_interval": DEFAULT_MIN_INTERVAL,
+            "max_interval": DEFAULT_MAX_INTERVAL
         }
+        self.state_store.put_settings(guild.id, self.guild_settings[guild.id])
         logger.info(f"Bot ajouté au serveur: {guild.name}")
 
     async def on_command_error(self, ctx, error):
@@ -66,6 +1899,125 @@ class TwitterMonitorBot(commands.Bot):
             logger.error(f"Erreur de commande: {error}")
             await ctx.send(f"❌ Une erreur s'est produite. Vérifiez les logs.")
 
+    # ------------------------------------------------------------------
+    # Abonnements
+    # ------------------------------------------------------------------
+
+    def add_subscription(self, guild_id: int, chan_id: int, handle: str, last_tweet_id: str | None = None) -> bool:
+        """Ajoute un abonnement et le persiste. Retourne False si déjà présent."""
+        subscription = self._index_subscription(guild_id, chan_id, handle)
+        if subscription is None:
+            return False
+
+        self.state_store.put_subscription(guild_id, chan_id, handle)
+        self.ensure_scheduled(handle)
+        if last_tweet_id is not None:
+            self.set_cursor(subscription, last_tweet_id)
+        return True
+
+    def _index_subscription(self, guild_id: int, chan_id: int, handle: str) -> Subscription | None:
+        """Ajoute un abonnement au registre en mémoire uniquement"""
+        subscription = self.subscriptions.add(guild_id, chan_id, handle)
+        if subscription is not None:
+            self._keyword_matchers.pop(handle, None)
+        return subscription
+
+    def set_cursor(self, subscription: Subscription, tweet_id: str):
+        """Avance le curseur de livraison d'un abonnement"""
+        subscription.cursor = tweet_id
+        self.state_store.put_cursor(
+            subscription.guild_id, subscription.channel_id, self.subscriptions.handle(subscription), tweet_id
+        )
+
+    def remove_subscription(self, guild_id: int, chan_id: int, handle: str) -> bool:
+        """Retire un abonnement et son curseur. Retourne False s'il n'existait pas."""
+        if not self._unindex_subscription(guild_id, chan_id, handle):
+            return False
+
+        self.state_store.delete_subscription(guild_id, chan_id, handle)
+        return True
+
+    def _unindex_subscription(self, guild_id: int, chan_id: int, handle: str) -> bool:
+        """Retire un abonnement du registre en mémoire uniquement"""
+        if self.subscriptions.remove(guild_id, chan_id, handle) is None:
+            return False
+
+        self._keyword_matchers.pop(handle, None)
+        if handle not in self.subscriptions:
+            self.scheduler.unschedule(handle)
+            for key in [key for key in self._feed_cache if key[1] == handle]:
+                del self._feed_cache[key]
+        return True
+
+    def owns(self, handle: str) -> bool:
+        """Vrai si ce worker est chargé de récupérer le compte"""
+        return WORKER_COUNT == 1 or self.hash_ring.owner(handle) == WORKER_ID
+
+    # ------------------------------------------------------------------
+    # Échéancier
+    # ------------------------------------------------------------------
+
+    def handle_interval(self, handle: str) -> float:
+        """Intervalle d'un compte : le plus court parmi les serveurs abonnés"""
+        stats = self.posting_stats.get(handle)
+        now = time.time()
+        intervals = []
+        for guild_id in self.subscriptions.guild_ids(handle):
+            settings = self.guild_settings.get(guild_id, {})
+            interval = settings.get("check_interval", DEFAULT_CHECK_INTERVAL)
+            if settings.get("adaptive", False) and stats is not None:
+                interval = stats.interval(
+                    now, interval,
+                    settings.get("min_interval", DEFAULT_MIN_INTERVAL),
+                    settings.get("max_interval", DEFAULT_MAX_INTERVAL),
+                )
+            intervals.append(interval)
+        return min(intervals, default=DEFAULT_CHECK_INTERVAL)
+
+    def observe_posts(self, handle: str, tweets: list[dict]):
+        """Alimente les statistiques de publication d'un compte"""
+        stats = self.posting_stats.get(handle)
+        if stats is None:
+            stats = self.posting_stats[handle] = PostingStats()
+
+        recorded = False
+        for tweet in sorted((t for t in tweets if t.get("published_at")), key=lambda t: t["published_at"]):
+            recorded |= stats.record(tweet["published_at"])
+        if recorded:
+            self.state_store.put_posting_stats(handle, stats.to_dict())
+
+    def ensure_scheduled(self, handle: str):
+        """
+        Programme un compte à un instant aléatoire de son intervalle ; s'il est déjà
+        programmé (nouvel abonné), avance son échéance si l'intervalle a raccourci.
+        """
+        if handle in self._polling or not self.owns(handle):
+            return  # schedule_next appliquera l'intervalle à jour après la récupération
+        if handle in self.scheduler:
+            self.pull_forward(handle)
+            return
+        self.scheduler.schedule(handle, time.monotonic() + random.uniform(0, self.handle_interval(handle)))
+
+    def pull_forward(self, handle: str):
+        """Avance l'échéance d'un compte si elle dépasse son intervalle actuel"""
+        due = self.scheduler.due_at(handle)
+        latest = time.monotonic() + random.uniform(0, self.handle_interval(handle))
+        if due is not None and latest < due:
+            self.scheduler.schedule(handle, latest)
+
+    def schedule_next(self, handle: str):
+        """Reprogramme un compte après une récupération, avec une gigue pour éviter les rafales"""
+        if handle not in self.subscriptions:
+            return
+        interval = self.handle_interval(handle)
+        jitter = random.uniform(-SCHEDULER_JITTER, SCHEDULER_JITTER) * interval
+        self.scheduler.schedule(handle, time.monotonic() + interval + jitter)
+
+    def reschedule_guild(self, guild_id: int):
+        """Avance les échéances des comptes d'un serveur dont l'intervalle a été réduit"""
+        for handle in self.subscriptions.guild_handles(guild_id):
+            self.pull_forward(handle)
+
     # ------------------------------------------------------------------
     # API Twitter via Nitter
     # ------------------------------------------------------------------
@@ -75,68 +2027,205 @@ class TwitterMonitorBot(commands.Bot):
         Récupère le dernier tweet via Nitter RSS.
         Méthode robuste qui évite l'API Twitter payante.
         """
-        # Nitter instances (fallback si l'une ne marche pas)
-        nitter_instances = [
-            "https://nitter.net",
-            "https://nitter.it",
-            "https://nitter.privacydev.net"
-        ]
-        
-        for instance in nitter_instances:
-            url = f"{instance}/{handle}/rss"
-            try:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                    async with session.get(url) as resp:
-                        if resp.status != 200:
-                            continue
-                        
-                        text = await resp.text()
-                        feed = feedparser.parse(text)
-                        
-                        if not feed.entries:
-                            continue
-                            
-                        entry = feed.entries[0]
-                        
-                        # Extraire l'ID du tweet depuis l'URL
-                        tweet_id = None
-                        if hasattr(entry, 'id') and entry.id:
-                            tweet_id = entry.id.split("/")[-1]
-                        elif hasattr(entry, 'link') and entry.link:
-                            tweet_id = entry.link.split("/")[-1]
-                        
-                        if not tweet_id:
-                            continue
-                            
-                        return {
-                            "id": tweet_id,
-                            "url": entry.link.replace("nitter", "x.com").replace("twitter.com", "x.com"),
-                            "text": entry.title or entry.summary or "Nouveau tweet",
-                            "created_at": datetime.utcnow(),
-                            "author": handle,
-                            "instance_used": instance
-                        }
-                        
-            except Exception as e:
-                logger.warning(f"Échec {instance} pour @{handle}: {e}")
-                continue
+        tweets = await self.fetch_tweets(handle, limit=1)
+        return tweets[-1] if tweets else None
+
+    async def fetch_tweets(self, handle: str, since_id: str | None = None, limit: int | None = None) -> list[dict] | None:
+        """
+        Récupère les tweets plus récents que `since_id` (au plus les `limit` plus récents),
+        du plus ancien au plus récent. Retourne None si aucune instance n'a répondu.
+        Les instances sont essayées de la plus saine à la moins saine.
+        """
+        instances = self.instance_pool.ranked()
+        fetch = functools.partial(self._try_instance, handle=handle, since_id=since_id, limit=limit)
+
+        if HEDGE_ENABLED and len(instances) > 1:
+            tweets = await self._hedged_fetch(instances[0], instances[1], fetch)
+            if tweets is not None:
+                return tweets
+            instances = instances[2:]
+
+        for instance in instances:
+            tweets = await fetch(instance)
+            if tweets is not None:
+                return tweets
         
         logger.error(f"Impossible de récupérer les tweets de @{handle} sur toutes les instances")
         return None
 
-    async def send_tweet_notification(self, channel: discord.TextChannel, handle: str, tweet_data: dict, is_test=False):
-        """Envoie une notification de nouveau tweet"""
+    async def _hedged_fetch(self, primary: InstanceHealth, backup: InstanceHealth, fetch) -> list[dict] | None:
+        """
+        Interroge l'instance principale ; si elle n'a pas répondu au bout du délai
+        de couverture, interroge aussi la suivante et garde la première réponse valide.
+        """
+        tasks = [asyncio.create_task(fetch(primary))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=primary.hedge_delay())
+            if done:
+                tweets = tasks[0].result()
+                return tweets if tweets is not None else await fetch(backup)
+
+            # Budget de la minute épuisé : repli séquentiel après la principale
+            now = time.monotonic()
+            if now - self._hedge_window_start >= 60:
+                self._hedge_window_start = now
+                self._hedge_budget = HEDGE_BUDGET_PER_MINUTE
+            hedged = self._hedge_budget > 0
+            if hedged:
+                self._hedge_budget -= 1
+                self.hedged_requests += 1
+                tasks.append(asyncio.create_task(fetch(backup)))
+
+            for next_done in asyncio.as_completed(tasks):
+                tweets = await next_done
+                if tweets is not None:
+                    return tweets
+
+            return None if hedged else await fetch(backup)
+        finally:
+            # Annuler la requête perdante
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _try_instance(self, instance: InstanceHealth, handle: str, since_id: str | None = None,
+                            limit: int | None = None) -> list[dict] | None:
+        """Comme _fetch_from_instance, mais journalise les erreurs au lieu de les propager"""
         try:
-            guild = channel.guild
-            settings = self.guild_settings.get(guild.id, {})
-            role_id = settings.get("notification_role")
-            content = ""
+            return await self._fetch_from_instance(instance, handle, since_id, limit)
+        except Exception as e:
+            logger.warning(f"Échec {instance.url} pour @{handle}: {e}")
+            return None
+
+    async def _fetch_from_instance(self, instance: InstanceHealth, handle: str, since_id: str | None = None,
+                                   limit: int | None = None) -> list[dict] | None:
+        """Récupère les tweets d'un compte sur une instance donnée et met à jour sa santé"""
+        url = f"{instance.url}/{handle}/rss"
+        cache_key = (instance.url, handle)
+        cached = self._feed_cache.get(cache_key)
+        if cached and not self._cache_covers(cached, since_id, limit):
+            cached = None
+
+        # Requête conditionnelle si le flux a déjà été récupéré sur cette instance
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with instance.semaphore:
+            # Après le sémaphore : une sonde annulée pendant l'attente ne bloque pas l'instance
+            if not self.instance_pool.try_acquire(instance):
+                return None
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async with self.http_session.get(url, headers=headers) as resp:
+                    outcome = "5xx" if resp.status >= 500 else str(resp.status)
+                    FETCH_RESPONSES.inc(instance=instance.url, code=outcome)
+                    if resp.status == 429:
+                        retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+                        self.instance_pool.record_failure(instance, rate_limited=True, retry_after=retry_after)
+                        return None
+                    if resp.status >= 400 and resp.status != 404:
+                        # Erreur serveur ou page de blocage (403 Cloudflare...) : l'instance est en cause,
+                        # alors qu'un 404 signale seulement un compte inexistant
+                        self.instance_pool.record_failure(instance)
+                        return None
+
+                    status = resp.status
+                    body = await resp.read() if status == 200 else None
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                instance.probe_in_flight = False
+                raise
+            except Exception as e:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                FETCH_RESPONSES.inc(instance=instance.url, code=outcome)
+                self.instance_pool.record_failure(instance)
+                raise
+            finally:
+                # Mesuré quelle que soit l'issue : les délais d'attente comptent aussi
+                latency = time.perf_counter() - started
+                FETCH_SECONDS.observe(latency, instance=instance.url, outcome=outcome)
+                PROFILER.record("fetch" if outcome in ("200", "304") else f"fetch_{outcome}", latency)
+            self.instance_pool.record_success(instance, latency)
+
+        if status == 304 and cached:
+            return self._select_entries(cached["entries"], since_id, limit)
+        if status != 200:
+            return None
+
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+
+        # Contenu identique malgré un 200 : inutile de re-parser
+        if cached and cached["hash"] == digest:
+            cached["etag"] = etag
+            cached["last_modified"] = last_modified
+            return self._select_entries(cached["entries"], since_id, limit)
+
+        # Analyse hors de la boucle d'événements
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        entries = await loop.run_in_executor(
+            self._parse_executor, functools.partial(parse_feed, body, handle, since_id=since_id, limit=limit)
+        )
+        parse_seconds = time.perf_counter() - started
+        PARSE_SECONDS.observe(parse_seconds)
+        PROFILER.record("parse", parse_seconds)
+        if entries is None:
+            return None
 
+        now = datetime.utcnow()
+        for tweet in entries:
+            tweet["created_at"] = now
+            tweet["instance_used"] = instance.url
+
+        # Plancher : le cache contient tous les tweets d'ID strictement supérieur
+        if limit is not None and len(entries) >= limit:
+            floor = tweet_id_value(entries[-1]["id"]) - 1
+        elif since_id is not None:
+            floor = tweet_id_value(since_id)
+        else:
+            floor = -1
+
+        self._feed_cache[cache_key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "hash": digest,
+            "entries": entries,
+            "floor": floor,
+        }
+        return self._select_entries(entries, since_id, limit)
+
+    @staticmethod
+    def _cache_covers(cached: dict, since_id: str | None, limit: int | None) -> bool:
+        """Indique si les items en cache suffisent à répondre à la requête"""
+        if since_id is None and limit is not None:
+            return bool(cached["entries"])
+        required = tweet_id_value(since_id) if since_id is not None else -1
+        return cached["floor"] <= required
+
+    @staticmethod
+    def _select_entries(entries: list[dict], since_id: str | None, limit: int | None) -> list[dict]:
+        """Items (du plus récent au plus ancien) plus récents que le curseur, remis du plus ancien au plus récent"""
+        since_value = tweet_id_value(since_id)
+        selected = [tweet for tweet in entries if since_id is None or tweet_id_value(tweet["id"]) > since_value]
+        if limit is not None:
+            selected = selected[:limit]
+        return sorted(selected, key=lambda tweet: tweet_id_value(tweet["id"]))
+
+    async def send_tweet_notification(self, channel: discord.TextChannel, handle: str, tweet_data: dict, is_test=False) -> bool:
+        """
+        Envoie une notification de nouveau tweet. Retourne False si l'envoi est refusé (permissions,
+        canal supprimé) ; les erreurs transitoires sont propagées pour être réessayées.
+        """
+        try:
             # Mention du rôle si configuré
-            if role_id and not is_test:
-                role = guild.get_role(role_id)
-                if role:
-                    content += f"{role.mention} "
+            content = "" if is_test else self._role_mention(channel)
 
             # Formatage du message
             emoji = "🧪" if is_test else "📱"
@@ -150,10 +2239,41 @@ class TwitterMonitorBot(commands.Bot):
                 content += f"\n`ID: {tweet_data['id']}`"
             
             await channel.send(content)
-            logger.info(f"Tweet notifié: @{handle} dans #{channel.name}")
+            logger.info(f"Tweet notifié: @{handle} dans #{getattr(channel, 'name', channel.id)}")
+            return True
             
-        except Exception as e:
+        except (discord.Forbidden, discord.NotFound) as e:
+            logger.error(f"Erreur lors de l'envoi de notification: {e}")
+            return False
+
+    async def send_tweet_batch(self, channel: discord.TextChannel, tweets: list[tuple[str, dict]]) -> bool:
+        """Envoie plusieurs tweets en attente dans un seul message. Mêmes erreurs que send_tweet_notification."""
+        try:
+            content = self._role_mention(channel)
+            content += f"📱 {len(tweets)} nouveaux tweets:"
+            for handle, tweet_data in tweets:
+                content += f"\n• **@{handle}**: {tweet_data['url']}"
+
+            await channel.send(content)
+            logger.info(f"{len(tweets)} tweets notifiés dans #{getattr(channel, 'name', channel.id)}")
+            return True
+
+        except (discord.Forbidden, discord.NotFound) as e:
             logger.error(f"Erreur lors de l'envoi de notification: {e}")
+            return False
+
+    def _role_mention(self, channel: discord.abc.Messageable) -> str:
+        """Mention du rôle de notification du serveur, suivie d'un espace, ou chaîne vide"""
+        guild = channel.guild
+        guild_id = guild.id if guild is not None else channel.guild_id
+        role_id = self.guild_settings.get(guild_id, {}).get("notification_role")
+        if not role_id:
+            return ""
+        if guild is None:
+            # Canal partiel (worker sans gateway) : rôle non vérifiable, mention brute
+            return f"<@&{role_id}> "
+        role = guild.get_role(role_id)
+        return f"{role.mention} " if role else ""
 
     # ------------------------------------------------------------------
     # Commandes
@@ -186,25 +2306,14 @@ class TwitterMonitorBot(commands.Bot):
         guild_id = ctx.guild.id
         chan_id = channel.id
 
-        # Initialiser les structures
-        if guild_id not in self.monitored_accounts:
-            self.monitored_accounts[guild_id] = {}
-        if chan_id not in self.monitored_accounts[guild_id]:
-            self.monitored_accounts[guild_id][chan_id] = []
         if guild_id not in self.guild_settings:
             await self.on_guild_join(ctx.guild)
 
-        # Vérifier les doublons
-        if handle in self.monitored_accounts[guild_id][chan_id]:
+        # Ajouter à la surveillance en mémorisant le dernier tweet pour éviter le spam au démarrage
+        if not self.add_subscription(guild_id, chan_id, handle, test_tweet["id"]):
             await ctx.send(f"❌ Le compte @{handle} est déjà surveillé dans {channel.mention}.")
             return
 
-        # Ajouter à la surveillance
-        self.monitored_accounts[guild_id][chan_id].append(handle)
-        
-        # Mémoriser le dernier tweet pour éviter le spam au démarrage
-        self.last_tweet_ids[handle] = test_tweet["id"]
-
         embed = discord.Embed(
             title="✅ Surveillance configurée",
             description=f"Le compte **@{handle}** sera désormais surveillé dans {channel.mention}",
@@ -216,6 +2325,107 @@ class TwitterMonitorBot(commands.Bot):
         
         await ctx.send(embed=embed)
 
+    @commands.command(name="bulk")
+    @commands.has_permissions(administrator=True)
+    async def bulk_import(self, ctx, channel: discord.TextChannel | None = None, *account_handles: str):
+        """
+        Surveille plusieurs comptes d'un coup, vérifiés en parallèle
+        Usage: !ww bulk #news-channel @compte1 @compte2 ...
+        Ou joindre un fichier JSON/CSV (compte, canal facultatif) à la commande
+        """
+        default_channel = channel or ctx.channel
+        entries = [(handle, None) for handle in account_handles]
+        for attachment in ctx.message.attachments:
+            if attachment.size > BULK_MAX_FILE_SIZE:
+                await ctx.send(f"❌ Fichier `{attachment.filename}` trop volumineux (max {BULK_MAX_FILE_SIZE // 1024} Ko).")
+                return
+            try:
+                entries += parse_import_file(attachment.filename, await attachment.read())
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                await ctx.send(f"❌ Fichier `{attachment.filename}` illisible: {e}")
+                return
+
+        if not entries:
+            await ctx.send("❌ Aucun compte fourni. Usage: `!ww bulk #canal @compte1 @compte2` ou un fichier JSON/CSV joint.")
+            return
+        if len(entries) > BULK_MAX_HANDLES:
+            await ctx.send(f"❌ Trop de comptes ({len(entries)}), maximum {BULK_MAX_HANDLES} par import.")
+            return
+
+        # Normaliser et résoudre les canaux avant toute requête
+        results = {}   # {(compte, canal): message}
+        targets = []   # [(compte, canal)]
+        for raw_handle, raw_channel in entries:
+            handle = raw_handle.strip().lstrip("@")
+            target = self._resolve_channel(ctx.guild, raw_channel) if raw_channel else default_channel
+            if target is None:
+                results[(handle, None)] = f"❌ canal `{raw_channel}` introuvable"
+            elif not HANDLE_RE.match(handle):
+                results[(handle, target)] = "❌ nom de compte invalide"
+            elif (handle, target) not in targets:
+                targets.append((handle, target))
+
+        # Une seule vérification par compte, en parallèle, via le chemin de récupération partagé
+        handles = list(dict.fromkeys(handle for handle, _ in targets))
+        await ctx.send(f"🔍 Vérification de {len(handles)} compte(s)...")
+
+        async def probe(handle: str) -> dict | None:
+            async with self._poll_semaphore:
+                return await self.get_latest_tweet(handle)
+
+        probes = dict(zip(handles, await asyncio.gather(*(probe(handle) for handle in handles))))
+
+        guild_id = ctx.guild.id
+        if guild_id not in self.guild_settings:
+            await self.on_guild_join(ctx.guild)
+
+        added = 0
+        for handle, target in targets:
+            latest = probes[handle]
+            if latest is None:
+                results[(handle, target)] = "❌ introuvable ou privé"
+            elif self.add_subscription(guild_id, target.id, handle, latest["id"]):
+                results[(handle, target)] = f"✅ ajouté (dernier tweet `{latest['id']}`)"
+                added += 1
+            else:
+                results[(handle, target)] = "⏭️ déjà surveillé"
+
+        # Tous les abonnements écrits dans une seule transaction
+        if added:
+            try:
+                await self.state_store.flush()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture de l'import groupé: {e}")
+
+        lines = [
+            f"**@{handle}**{f' → {target.mention}' if target else ''}: {message}"
+            for (handle, target), message in results.items()
+        ]
+        description = ""
+        for index, line in enumerate(lines):
+            if len(description) + len(line) > 3900:
+                description += f"\n… et {len(lines) - index} autre(s)"
+                break
+            description += f"{line}\n"
+
+        embed = discord.Embed(
+            title=f"📥 Import groupé: {added}/{len(results)} compte(s) ajouté(s)",
+            description=description,
+            color=0x00d4ff if added else 0xff6b6b,
+        )
+        embed.add_field(name="Intervalle", value=f"{self.guild_settings[guild_id]['check_interval']} secondes", inline=True)
+        await ctx.send(embed=embed)
+
+    @staticmethod
+    def _resolve_channel(guild: discord.Guild, value: str) -> discord.TextChannel | None:
+        """Canal textuel désigné par une mention, un identifiant ou un nom"""
+        value = value.strip()
+        match = re.fullmatch(r"<#(\d+)>|(\d+)", value)
+        if match:
+            channel = guild.get_channel(int(match.group(1) or match.group(2)))
+            return channel if isinstance(channel, discord.TextChannel) else None
+        return discord.utils.get(guild.text_channels, name=value.lstrip("#"))
+
     @commands.command(name="remove")
     @commands.has_permissions(administrator=True)
     async def remove_monitoring(self, ctx, account_handle: str, channel: discord.TextChannel = None):
@@ -230,13 +2440,9 @@ class TwitterMonitorBot(commands.Bot):
         guild_id = ctx.guild.id
         chan_id = channel.id
 
-        try:
-            self.monitored_accounts[guild_id][chan_id].remove(handle)
-            # Nettoyer le dernier ID mémorisé
-            if handle in self.last_tweet_ids:
-                del self.last_tweet_ids[handle]
+        if self.remove_subscription(guild_id, chan_id, handle):
             await ctx.send(f"✅ Le compte @{handle} n'est plus surveillé dans {channel.mention}.")
-        except (KeyError, ValueError):
+        else:
             await ctx.send(f"❌ Le compte @{handle} n'était pas surveillé dans {channel.mention}.")
 
     @commands.command(name="list")
@@ -244,7 +2450,8 @@ class TwitterMonitorBot(commands.Bot):
         """Affiche tous les comptes surveillés sur ce serveur"""
         guild_id = ctx.guild.id
         
-        if guild_id not in self.monitored_accounts or not any(self.monitored_accounts[guild_id].values()):
+        total_accounts, _ = self.subscriptions.guild_counts(guild_id)
+        if not total_accounts:
             await ctx.send("❌ Aucun compte surveillé sur ce serveur.")
             return
 
@@ -254,17 +2461,12 @@ class TwitterMonitorBot(commands.Bot):
             timestamp=datetime.utcnow()
         )
         
-        total_accounts = 0
-        for chan_id, accounts in self.monitored_accounts[guild_id].items():
-            if not accounts:
-                continue
-                
+        for chan_id in self.subscriptions.guild_channels(guild_id):
             channel = self.get_channel(chan_id)
             channel_name = f"#{channel.name}" if channel else f"Canal supprimé ({chan_id})"
-            accounts_list = "\n".join([f"• @{account}" for account in accounts])
+            accounts_list = "\n".join([f"• @{account}" for account in self.subscriptions.channel_handles(chan_id)])
             
             embed.add_field(name=channel_name, value=accounts_list, inline=False)
-            total_accounts += len(accounts)
         
         embed.set_footer(text=f"Total: {total_accounts} compte(s) surveillé(s)")
         await ctx.send(embed=embed)
@@ -292,11 +2494,25 @@ class TwitterMonitorBot(commands.Bot):
             
             role = ctx.guild.get_role(settings['notification_role']) if settings['notification_role'] else None
             embed.add_field(name="Rôle de notification", value=role.mention if role else "Aucun", inline=True)
+
+            adaptive = settings.get('adaptive', False)
+            embed.add_field(name="Fréquence adaptative", value="Oui" if adaptive else "Non", inline=True)
+            embed.add_field(
+                name="Bornes adaptatives",
+                value=f"{settings.get('min_interval', DEFAULT_MIN_INTERVAL)}s – {settings.get('max_interval', DEFAULT_MAX_INTERVAL)}s",
+                inline=True
+            )
+            embed.add_field(name="Mots-clés requis", value=", ".join(f"`{k}`" for k in settings.get('include_keywords', [])) or "Aucun", inline=False)
+            embed.add_field(name="Mots-clés exclus", value=", ".join(f"`{k}`" for k in settings.get('exclude_keywords', [])) or "Aucun", inline=False)
             
             embed.add_field(name="Commandes disponibles", value="""
             `!ww settings interval 300` - Changer l'intervalle (en secondes, min 60)
             `!ww settings retweets true/false` - Inclure les retweets
             `!ww settings role @MonRole` - Définir le rôle à mentionner
+            `!ww settings adaptive true/false` - Adapter la fréquence au rythme du compte
+            `!ww settings min 60` / `!ww settings max 1800` - Bornes du mode adaptatif
+            `!ww settings include banner, re:v\\d{1,2}\\.\\d` - Mots-clés requis (none pour vider)
+            `!ww settings exclude leak` - Mots-clés exclus (none pour vider)
             """, inline=False)
             
             await ctx.send(embed=embed)
@@ -310,6 +2526,7 @@ class TwitterMonitorBot(commands.Bot):
                     await ctx.send("❌ L'intervalle minimum est de 60 secondes pour éviter le spam.")
                     return
                 self.guild_settings[guild_id]["check_interval"] = interval
+                self.reschedule_guild(guild_id)
                 await ctx.send(f"✅ Intervalle mis à jour: {interval} secondes")
                 
             elif setting.lower() in ["retweets", "rt"]:
@@ -317,6 +2534,45 @@ class TwitterMonitorBot(commands.Bot):
                 self.guild_settings[guild_id]["include_retweets"] = include_rt
                 await ctx.send(f"✅ Retweets: {'Inclus' if include_rt else 'Exclus'}")
                 
+            elif setting.lower() in ["adaptive", "adaptatif"]:
+                adaptive = value.lower() in ("true", "1", "yes", "oui", "on")
+                self.guild_settings[guild_id]["adaptive"] = adaptive
+                self.reschedule_guild(guild_id)
+                await ctx.send(f"✅ Fréquence adaptative: {'Activée' if adaptive else 'Désactivée'}")
+
+            elif setting.lower() in ["min", "max"]:
+                bound = int(value)
+                settings = self.guild_settings[guild_id]
+                minimum = bound if setting.lower() == "min" else settings.get("min_interval", DEFAULT_MIN_INTERVAL)
+                maximum = bound if setting.lower() == "max" else settings.get("max_interval", DEFAULT_MAX_INTERVAL)
+                if minimum < 60:
+                    await ctx.send("❌ L'intervalle minimum est de 60 secondes pour éviter le spam.")
+                    return
+                if maximum < minimum:
+                    await ctx.send("❌ La borne maximale doit être supérieure ou égale à la borne minimale.")
+                    return
+                settings["min_interval"] = minimum
+                settings["max_interval"] = maximum
+                self.reschedule_guild(guild_id)
+                await ctx.send(f"✅ Bornes adaptatives: {minimum}s – {maximum}s")
+
+            elif setting.lower() in ["include", "exclude"]:
+                kind = setting.lower()
+                if value is None or value.lower() in ["none", "aucun", "reset"]:
+                    keywords = []
+                else:
+                    keywords = split_keywords(value)
+                for keyword in keywords:
+                    if keyword.startswith(REGEX_PREFIX):
+                        error = validate_keyword_regex(keyword[len(REGEX_PREFIX):])
+                        if error:
+                            await ctx.send(f"❌ Expression régulière invalide `{keyword}`: {error}")
+                            return
+                self.guild_settings[guild_id][f"{kind}_keywords"] = keywords
+                self.invalidate_keyword_filters(guild_id)
+                label = "requis" if kind == "include" else "exclus"
+                await ctx.send(f"✅ Mots-clés {label}: {', '.join(f'`{k}`' for k in keywords) or 'aucun'}")
+
             elif setting.lower() == "role":
                 if value.lower() in ["none", "aucun", "reset"]:
                     self.guild_settings[guild_id]["notification_role"] = None
@@ -340,6 +2596,8 @@ class TwitterMonitorBot(commands.Bot):
         except ValueError:
             await ctx.send("❌ Valeur invalide. Vérifiez le format de votre commande.")
 
+        self.state_store.put_settings(guild_id, self.guild_settings[guild_id])
+
     @commands.command(name="test")
     @commands.has_permissions(administrator=True)
     async def test_monitoring(self, ctx, account_handle: str):
@@ -379,14 +2637,8 @@ class TwitterMonitorBot(commands.Bot):
         """Affiche le statut du bot et des surveillances actives"""
         guild_id = ctx.guild.id
         
-        # Compter les surveillances
-        total_accounts = 0
-        total_channels = 0
-        if guild_id in self.monitored_accounts:
-            for accounts in self.monitored_accounts[guild_id].values():
-                if accounts:
-                    total_channels += 1
-                    total_accounts += len(accounts)
+        # Compteurs tenus à jour par le registre
+        total_accounts, total_channels = self.subscriptions.guild_counts(guild_id)
         
         embed = discord.Embed(
             title="📊 Statut du Bot",
@@ -402,15 +2654,180 @@ class TwitterMonitorBot(commands.Bot):
         embed.add_field(name="⏱️ Intervalle", value=f"{settings.get('check_interval', 300)}s", inline=True)
         embed.add_field(name="🔄 Retweets", value="Oui" if settings.get('include_retweets', False) else "Non", inline=True)
         embed.add_field(name="🏓 Surveillance", value="Active" if self.monitor_twitter.is_running() else "Inactive", inline=True)
+
+        if self.last_tick_duration is not None:
+            embed.add_field(name="⚡ Dernier lot", value=f"{self.last_tick_duration:.1f}s", inline=True)
+        embed.add_field(
+            name="📨 File d'envoi",
+            value=(
+                f"{self.delivery.depth} en attente • délai {self.delivery.last_lag:.1f}s (max {self.delivery.max_lag:.1f}s)"
+                f" • {self.delivery.failed} échec(s)"
+            ),
+            inline=True
+        )
+        embed.add_field(name="🗓️ Comptes programmés", value=f"{len(self.scheduler)} (retard {self.scheduler.last_lag:.1f}s)", inline=True)
+        if WORKER_COUNT > 1 or SHARD_COUNT is not None:
+            embed.add_field(
+                name="🧩 Répartition",
+                value=f"Shard {ctx.guild.shard_id} • worker {WORKER_ID + 1}/{WORKER_COUNT}",
+                inline=True
+            )
         
         # Dernière vérification
-        last_check = self._last_check.get(guild_id)
+        last_check = max(
+            filter(None, (self._last_check.get(handle) for handle in self.subscriptions.guild_handles(guild_id))),
+            default=None
+        )
         if last_check:
             time_since = datetime.utcnow() - last_check
             embed.add_field(name="🕒 Dernière vérification", value=f"Il y a {int(time_since.total_seconds())}s", inline=True)
         
         await ctx.send(embed=embed)
 
+    @commands.command(name="search")
+    async def search_archive(self, ctx, *, query: str = ""):
+        """
+        Recherche dans l'archive des tweets récupérés
+        Usage: !ww search bannière [@compte]
+        """
+        if not ARCHIVE_ENABLED:
+            await ctx.send("❌ L'archive des tweets est désactivée.")
+            return
+
+        handles = [word.lstrip("@") for word in query.split() if word.startswith("@")]
+        words = " ".join(word for word in query.split() if not word.startswith("@"))
+        if not words:
+            await ctx.send("❌ Usage: `!ww search <mots> [@compte]`")
+            return
+
+        started = time.perf_counter()
+        try:
+            results = await self.state_store.search_tweets(words, handles[0] if handles else None)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur de recherche dans l'archive: {e}")
+            await ctx.send("❌ Recherche impossible. Vérifiez les logs.")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if not results:
+            await ctx.send(f"🔍 Aucun tweet archivé ne correspond à « {words} ».")
+            return
+
+        embed = discord.Embed(title=f"🔍 Recherche: {words}", color=0x00d4ff)
+        for handle, url, published_at, snippet in results:
+            date = datetime.fromisoformat(published_at).strftime("%d/%m/%Y %H:%M") if published_at else "Date inconnue"
+            embed.add_field(name=f"@{handle} • {date}", value=f"{snippet[:900]}\n{url}", inline=False)
+        embed.set_footer(text=f"{len(results)} résultat(s) en {elapsed_ms:.0f} ms")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="perf")
+    @commands.has_permissions(administrator=True)
+    async def perf_command(self, ctx, action: str = None, seconds: float = 10):
+        """
+        Diagnostic des performances
+        Usage: !ww perf [on|off|reset|profile <secondes>]
+        """
+        action = (action or "").lower()
+        if action == "on":
+            PROFILER.enabled = True
+            self.start_watchdog()
+            await ctx.send("✅ Profilage activé (phases et blocages de la boucle).")
+            return
+        if action == "off":
+            PROFILER.enabled = False
+            if self._watchdog is not None:
+                self._watchdog.stop()
+            await ctx.send("✅ Profilage désactivé.")
+            return
+        if action == "reset":
+            PROFILER.reset()
+            await ctx.send("✅ Mesures de profilage remises à zéro.")
+            return
+
+        embed = discord.Embed(title="⚡ Performances", color=0x00d4ff, timestamp=datetime.utcnow())
+
+        if action == "profile":
+            seconds = min(max(seconds, 1), PROFILE_MAX_SECONDS)
+            await ctx.send(f"🔬 Échantillonnage de la boucle d'événements pendant {seconds:.0f}s...")
+            profile = await asyncio.to_thread(sample_profile, threading.get_ident(), seconds)
+            samples = profile["samples"] or 1
+            busy = samples - profile["idle"]
+            embed.description = (
+                f"{profile['samples']} échantillons sur {seconds:.0f}s • "
+                f"boucle occupée {busy / samples:.0%} du temps"
+            )
+            for title, tally in (("Temps propre", profile["own"]), ("Temps cumulé", profile["cumulative"])):
+                lines = [f"`{count / samples:>5.1%}` {label}" for label, count in tally.most_common(8)]
+                embed.add_field(name=f"🔥 {title}", value="\n".join(lines) or "Boucle inactive", inline=False)
+            await ctx.send(embed=embed)
+            return
+
+        if not PROFILER.enabled and not PROFILER.phases:
+            await ctx.send("ℹ️ Profilage inactif. `!ww perf on` pour l'activer, `!ww perf profile 10` pour un échantillonnage.")
+            return
+
+        # Phases classées par coût total
+        elapsed = max(time.time() - PROFILER.since, 1e-9)
+        lines = [
+            f"**{phase}**: {total:.1f}s ({total / elapsed:.1%} du temps) • {count} appel(s) • "
+            f"moy {total / count * 1000:.0f} ms • max {worst * 1000:.0f} ms"
+            for phase, (count, total, worst) in PROFILER.ranked()
+        ]
+        embed.add_field(name="⏱️ Phases (coût total)", value="\n".join(lines) or "Aucune mesure", inline=False)
+
+        loop_lag = EVENT_LOOP_LAG._values.get(())
+        if loop_lag and loop_lag["count"]:
+            embed.add_field(name="🔁 Retard moyen de la boucle", value=f"{loop_lag['sum'] / loop_lag['count'] * 1000:.1f} ms", inline=True)
+
+        stalls = sorted(PROFILER.stalls, key=lambda stall: stall[1], reverse=True)[:3]
+        embed.add_field(
+            name=f"🧊 Blocages > {STALL_THRESHOLD}s",
+            value="\n".join(
+                f"{duration:.2f}s à {datetime.utcfromtimestamp(at).strftime('%H:%M:%S')} dans `{stack[-1] if stack else 'inconnu'}`"
+                for at, duration, stack in stalls
+            ) or "Aucun",
+            inline=False
+        )
+        embed.set_footer(text=f"Mesures depuis {datetime.utcfromtimestamp(PROFILER.since).strftime('%d/%m %H:%M')} UTC")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="instances")
+    async def instances_status(self, ctx):
+        """Affiche la santé des instances Nitter"""
+        embed = discord.Embed(
+            title="🌐 Instances Nitter",
+            description="Classées de la plus saine à la moins saine",
+            color=0x00d4ff,
+            timestamp=datetime.utcnow()
+        )
+
+        states = {
+            InstanceHealth.CLOSED: "🟢 Active",
+            InstanceHealth.HALF_OPEN: "🟡 En test",
+            InstanceHealth.OPEN: "🔴 Désactivée",
+        }
+        now = time.monotonic()
+        for instance in sorted(self.instance_pool.instances, key=InstanceHealth.score):
+            state = states[instance.state]
+            if instance.state == InstanceHealth.OPEN:
+                state += f" ({max(0, int(instance.open_until - now))}s)"
+            latency = f"{instance.latency * 1000:.0f} ms" if instance.latency is not None else "—"
+            embed.add_field(
+                name=instance.url,
+                value=(
+                    f"{state}\n"
+                    f"Latence: {latency}\n"
+                    f"Erreurs: {instance.error_rate:.0%} • 429: {instance.rate_limit_rate:.0%}\n"
+                    f"Requêtes: {instance.requests}"
+                ),
+                inline=False
+            )
+
+        if HEDGE_ENABLED:
+            embed.set_footer(text=f"Requêtes couvertes: {self.hedged_requests} • Budget restant: {self._hedge_budget}/{HEDGE_BUDGET_PER_MINUTE} par minute")
+
+        await ctx.send(embed=embed)
+
     @commands.command(name="aide")
     async def help_command(self, ctx):
         """Affiche l'aide du bot"""
@@ -424,6 +2841,7 @@ class TwitterMonitorBot(commands.Bot):
             name="📋 Commandes principales",
             value="""
             `!ww setup @compte #canal` - Surveiller un compte
+            `!ww bulk #canal @compte1 @compte2` - Surveiller plusieurs comptes (ou fichier JSON/CSV joint)
             `!ww remove @compte #canal` - Arrêter la surveillance  
             `!ww list` - Voir les comptes surveillés
             `!ww test @compte` - Tester un compte
@@ -439,6 +2857,8 @@ class TwitterMonitorBot(commands.Bot):
             `!ww settings interval 300` - Changer l'intervalle (secondes)
             `!ww settings retweets true` - Inclure les retweets
             `!ww settings role @News` - Rôle à mentionner
+            `!ww settings adaptive true` - Fréquence adaptative
+            `!ww settings include/exclude mot1, mot2` - Filtres par mots-clés
             """,
             inline=False
         )
@@ -447,6 +2867,9 @@ class TwitterMonitorBot(commands.Bot):
             name="📊 Informations",
             value="""
             `!ww status` - Statut du bot
+            `!ww search mots [@compte]` - Rechercher dans les tweets archivés
+            `!ww instances` - Santé des instances Nitter
+            `!ww perf [on|off|profile 10]` - Diagnostic des performances
             `!ww aide` - Afficher cette aide
             """,
             inline=False
@@ -460,66 +2883,249 @@ class TwitterMonitorBot(commands.Bot):
     # Tâche de surveillance
     # ------------------------------------------------------------------
 
-    @tasks.loop(seconds=60)  # Vérification toutes les minutes
+    @tasks.loop(seconds=0)  # Enchaîné : chaque itération dort jusqu'à la prochaine échéance
     async def monitor_twitter(self):
         """Boucle principale de surveillance des comptes Twitter"""
-        now = datetime.utcnow()
-        
-        for guild_id, channels in self.monitored_accounts.items():
-            # Vérifier si c'est le moment de checker selon l'intervalle configuré
+        await self.scheduler.wait()
+
+        # Chaque compte n'est récupéré qu'une fois, quel que soit son nombre d'abonnés
+        due_handles = self.scheduler.pop_due(time.monotonic())
+        if not due_handles:
+            return
+        SCHEDULER_LAG.observe(self.scheduler.last_lag)
+
+        # Le lot tourne en tâche de fond : un compte lent ne retarde pas les échéances suivantes
+        self._polling.update(due_handles)
+        batch = asyncio.create_task(self.run_batch(due_handles))
+        self._batches.add(batch)
+        batch.add_done_callback(self._batches.discard)
+
+    async def run_batch(self, handles: list[str]):
+        """Récupère un lot de comptes échus en parallèle"""
+        started = time.perf_counter()
+        async with asyncio.TaskGroup() as tg:
+            for handle in handles:
+                tg.create_task(self.poll_handle(handle))
+
+        self.last_tick_duration = time.perf_counter() - started
+        BATCH_SECONDS.observe(self.last_tick_duration)
+        logger.debug(f"Lot terminé: {len(handles)} compte(s) en {self.last_tick_duration:.2f}s")
+
+    async def poll_handle(self, handle: str):
+        """Récupère un compte (sous le sémaphore global) puis distribue le résultat"""
+        try:
+            # Un seul téléchargement couvre le curseur le plus ancien parmi les abonnés
+            since_id = self.handle_cursor(handle)
+            async with self._poll_semaphore:
+                tweets = await self.fetch_tweets(handle, since_id=since_id, limit=None if since_id else 1)
+
+            # Une écriture par compte, quel que soit le nombre de serveurs abonnés
+            now = datetime.utcnow()
+            self._last_check[handle] = now
+            self.state_store.put_last_check(handle, now)
+
+            if tweets is None:
+                logger.warning(f"Pas de tweet récupéré pour @{handle}")
+                return
+            if not tweets:
+                return
+
+            if ARCHIVE_ENABLED:
+                self.state_store.put_tweets(handle, tweets)
+
+            # Rattrapage borné : le reste sera distribué à la prochaine vérification
+            if len(tweets) > MAX_CATCHUP_PER_TICK:
+                logger.info(f"@{handle}: {len(tweets)} nouveaux tweets, {MAX_CATCHUP_PER_TICK} distribués ce tour-ci")
+                tweets = tweets[:MAX_CATCHUP_PER_TICK]
+
+            self.observe_posts(handle, tweets)
+            with PROFILER.phase("filter"):
+                self.dispatch_tweets(handle, tweets)
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la surveillance de @{handle}: {e}")
+        finally:
+            self._polling.discard(handle)
+            self.schedule_next(handle)
+
+    def handle_cursor(self, handle: str) -> str | None:
+        """Curseur le plus ancien parmi les abonnés d'un compte (None si aucun n'en a)"""
+        cursors = [
+            subscription.cursor
+            for subscription in self.subscriptions.for_handle(handle)
+            if subscription.cursor is not None
+        ]
+        return min(cursors, key=tweet_id_value, default=None)
+
+    def keyword_matcher(self, handle: str) -> KeywordMatcher | None:
+        """Filtre compilé des serveurs abonnés à un compte (None si aucun filtre)"""
+        if handle in self._keyword_matchers:
+            return self._keyword_matchers[handle]
+
+        filters = {}
+        for guild_id in self.subscriptions.guild_ids(handle):
             settings = self.guild_settings.get(guild_id, {})
-            interval = settings.get("check_interval", 300)
+            for kind in ("include", "exclude"):
+                patterns = settings.get(f"{kind}_keywords")
+                if patterns:
+                    filters[(guild_id, kind)] = patterns
 
-            last_check = self._last_check.get(guild_id, now - timedelta(seconds=interval))
-            if (now - last_check).total_seconds() < interval:
-                continue
+        matcher = self._keyword_matchers[handle] = KeywordMatcher(filters) if filters else None
+        return matcher
+
+    def invalidate_keyword_filters(self, guild_id: int):
+        """Force la recompilation des filtres des comptes suivis par un serveur"""
+        for handle in self.subscriptions.guild_handles(guild_id):
+            self._keyword_matchers.pop(handle, None)
+
+    def dispatch_tweets(self, handle: str, tweets: list[dict]):
+        """
+        Distribue des tweets (du plus ancien au plus récent) à tous les abonnés du compte,
+        chacun avec son propre curseur. Les tweets déjà annoncés (flux périmé d'une
+        instance, changement d'instance, curseur perdu) sont écartés.
+        """
+        seen = self.seen_ids.get(handle)
+        if seen is None:
+            seen = self.seen_ids[handle] = SeenSet()
+        tweets = [tweet for tweet in tweets if tweet["id"] not in seen]
+        if not tweets:
+            return
+
+        # Une seule passe par tweet pour les filtres de tous les serveurs
+        matcher = self.keyword_matcher(handle)
+        matches = [matcher.match(tweet["text"]) if matcher else set() for tweet in tweets]
+
+        for subscription in list(self.subscriptions.for_handle(handle)):
+            guild_id = subscription.guild_id
+            cursor = tweet_id_value(subscription.cursor)
+            settings = self.guild_settings.get(guild_id, {})
 
-            # Mettre à jour le timestamp
-            self._last_check[guild_id] = now
-            logger.info(f"Vérification des tweets pour le serveur {guild_id}")
+            requires_include = bool(settings.get("include_keywords"))
 
-            for chan_id, accounts in channels.items():
-                if not accounts:
+            for tweet, matched in zip(tweets, matches):
+                if tweet_id_value(tweet["id"]) <= cursor:
                     continue
 
-                channel = self.get_channel(chan_id)
-                if not channel:
-                    logger.warning(f"Canal {chan_id} introuvable, nettoyage recommandé")
+                # Filtrer les retweets si nécessaire
+                if not settings.get("include_retweets", False):
+                    if tweet["text"].lower().startswith(("rt @", "retweet")):
+                        logger.info(f"Retweet ignoré de @{handle}: {tweet['id']}")
+                        self.set_cursor(subscription, tweet["id"])  # Marquer comme vu
+                        continue
+
+                # Filtrer selon les mots-clés du serveur
+                if (guild_id, "exclude") in matched or (requires_include and (guild_id, "include") not in matched):
+                    logger.info(f"Tweet filtré de @{handle} pour le serveur {guild_id}: {tweet['id']}")
+                    self.set_cursor(subscription, tweet["id"])
                     continue
 
-                for handle in accounts:
-                    try:
-                        tweet = await self.get_latest_tweet(handle)
-                        if not tweet:
-                            logger.warning(f"Pas de tweet récupéré pour @{handle}")
-                            continue
-
-                        # Vérifier si c'est un nouveau tweet
-                        last_id = self.last_tweet_ids.get(handle)
-                        if tweet["id"] != last_id:
-                            # Filtrer les retweets si nécessaire
-                            if not settings.get("include_retweets", False):
-                                if tweet["text"].lower().startswith(("rt @", "retweet")):
-                                    logger.info(f"Retweet ignoré de @{handle}: {tweet['id']}")
-                                    self.last_tweet_ids[handle] = tweet["id"]  # Marquer comme vu
-                                    continue
-
-                            await self.send_tweet_notification(channel, handle, tweet)
-                            self.last_tweet_ids[handle] = tweet["id"]
-                            
-                            # Anti-spam entre les notifications
-                            await asyncio.sleep(2)
-
-                    except Exception as e:
-                        logger.error(f"Erreur lors de la surveillance de @{handle}: {e}")
-
-                # Anti-spam entre les comptes
-                await asyncio.sleep(1)
+                self.delivery.enqueue(subscription.channel_id, handle, tweet)
+                self.set_cursor(subscription, tweet["id"])
+
+        for tweet in tweets:
+            seen.add(tweet["id"])
+        self.state_store.put_seen(handle, seen)
+
+    async def deliver_batch(self, chan_id: int, tweets: list[tuple[str, dict]]) -> bool:
+        """Envoie un lot de tweets en attente pour un canal (appelé par la file d'envoi). Retourne False en cas d'échec."""
+        channel = self.get_channel(chan_id)
+        guild_id = self.subscriptions.channel_guild(chan_id)
+        if not channel and guild_id is not None:
+            # Canal hors du cache (mode poller, ou shard géré par un autre processus) :
+            # envoi direct par l'API REST
+            channel = self.get_partial_messageable(chan_id, guild_id=guild_id)
+        if not channel:
+            logger.warning(f"Canal {chan_id} introuvable, nettoyage recommandé")
+            return False
+
+        with PROFILER.phase("send"):
+            if len(tweets) == 1:
+                return await self.send_tweet_notification(channel, *tweets[0])
+            return await self.send_tweet_batch(channel, tweets)
+
+    @tasks.loop(seconds=STATE_FLUSH_INTERVAL)
+    async def flush_state(self):
+        """Écrit périodiquement les mutations en attente dans le stockage persistant"""
+        try:
+            with PROFILER.phase("flush"):
+                await self.state_store.flush()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture de l'état: {e}")
+
+    @tasks.loop(seconds=ARCHIVE_PRUNE_INTERVAL)
+    async def prune_archive(self):
+        """Limite l'archive des tweets en âge et en nombre"""
+        try:
+            deleted = await self.state_store.prune_tweets(ARCHIVE_MAX_AGE_DAYS * 86400, ARCHIVE_MAX_ROWS)
+        except Exception as e:
+            logger.error(f"Erreur lors de la purge de l'archive: {e}")
+            return
+        if deleted:
+            logger.info(f"Archive purgée: {deleted} tweet(s) supprimé(s)")
+
+    @tasks.loop(seconds=SUBSCRIPTION_SYNC_INTERVAL)
+    async def sync_subscriptions(self):
+        """Relit les abonnements et paramètres écrits par les autres processus (WORKER_COUNT > 1)"""
+        try:
+            snapshot = await self.state_store.read_shared()
+        except Exception as e:
+            logger.error(f"Erreur lors de la relecture des abonnements: {e}")
+            return
+        self.apply_shared_state(snapshot)
+
+    def apply_shared_state(self, snapshot: dict):
+        """
+        Aligne les structures en mémoire sur le stockage partagé. Les mutations locales
+        pas encore écrites sont conservées ; le worker propriétaire d'un compte fait foi
+        pour ses curseurs, les autres adoptent ceux de la base.
+        """
+        stored = {(guild_id, chan_id, handle): tweet_id for guild_id, chan_id, handle, tweet_id in snapshot["subscriptions"]}
+        current = {
+            (subscription.guild_id, subscription.channel_id, self.subscriptions.handle(subscription))
+            for subscription in self.subscriptions
+        }
+        added = removed = 0
+
+        for key in current - stored.keys():
+            if not self.state_store.is_pending("subscriptions", *key):
+                removed += self._unindex_subscription(*key)
+
+        for key, tweet_id in stored.items():
+            is_new = key not in current
+            if is_new:
+                if self.state_store.is_pending("subscriptions", *key):
+                    continue  # supprimé localement, suppression pas encore écrite
+                subscription = self._index_subscription(*key)
+                added += 1
+            else:
+                subscription = self.subscriptions.get(*key)
+            if tweet_id is not None and (is_new or not self.owns(key[2])):
+                subscription.cursor = tweet_id
+            if is_new:
+                self.ensure_scheduled(key[2])
+
+        for guild_id, settings in snapshot["guild_settings"].items():
+            if self.guild_settings.get(guild_id) == settings or self.state_store.is_pending("guild_settings", guild_id):
+                continue
+            self.guild_settings[guild_id] = settings
+            self.invalidate_keyword_filters(guild_id)
+            self.reschedule_guild(guild_id)
+
+        if added or removed:
+            logger.info(f"Abonnements synchronisés: +{added} / -{removed} ({len(self.scheduler)} compte(s) pour ce worker)")
+
+    @tasks.loop(seconds=0)
+    async def measure_loop_lag(self):
+        """Mesure le retard de réveil de la boucle d'événements (callbacks bloquants)"""
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - started - LOOP_LAG_INTERVAL))
 
     @monitor_twitter.before_loop
     async def before_monitor_twitter(self):
         """Attendre que le bot soit prêt avant de commencer la surveillance"""
-        await self.wait_until_ready()
+        if WORKER_MODE != "poller":
+            await self.wait_until_ready()
         logger.info("Surveillance Twitter démarrée")
 
     @monitor_twitter.error
@@ -548,7 +3154,10 @@ if __name__ == "__main__":
     logger.info("🚀 Démarrage du bot Wuthering Waves Twitter Monitor...")
     
     try:
-        bot.run(token)
+        if WORKER_MODE == "poller":
+            asyncio.run(bot.run_poller(token))
+        else:
+            bot.run(token, log_handler=None)  # les logs de discord.py passent par la file
     except Exception as e:
         logger.error(f"❌ Erreur critique lors du démarrage: {e}")
         raise
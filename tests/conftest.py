@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Le bot est un module unique à la racine du dépôt
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("STATE_DB_PATH", ":memory:")
+os.environ.setdefault("METRICS_PORT", "0")
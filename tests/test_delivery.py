@@ -0,0 +1,67 @@
+import asyncio
+
+import main
+from main import DeliveryPipeline
+
+
+def run_pipeline(send_batch, items, timeout=5.0):
+    async def run():
+        pipeline = DeliveryPipeline(send_batch)
+        for chan_id, handle, tweet in items:
+            pipeline.enqueue(chan_id, handle, tweet)
+        await pipeline.drain(timeout)
+        return pipeline
+
+    return asyncio.run(run())
+
+
+def test_drain_sends_queued_tweets_before_stopping():
+    sent = []
+
+    async def send_batch(chan_id, batch):
+        await asyncio.sleep(0.01)
+        sent.extend(tweet["id"] for _, tweet in batch)
+        return True
+
+    pipeline = run_pipeline(send_batch, [(1, "a", {"id": str(i)}) for i in range(12)])
+    assert sorted(sent, key=int) == [str(i) for i in range(12)]
+    assert pipeline.depth == 0 and pipeline.in_flight == 0
+    assert pipeline.failed == 0
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(main, "DELIVERY_RETRY_DELAY", 0)
+    calls = []
+
+    async def send_batch(chan_id, batch):
+        calls.append(chan_id)
+        if len(calls) < main.DELIVERY_MAX_ATTEMPTS:
+            raise ConnectionError("reset")
+        return True
+
+    pipeline = run_pipeline(send_batch, [(1, "a", {"id": "1"})])
+    assert len(calls) == main.DELIVERY_MAX_ATTEMPTS
+    assert pipeline.sent == 1 and pipeline.failed == 0
+
+
+def test_refused_sends_are_not_retried(monkeypatch):
+    monkeypatch.setattr(main, "DELIVERY_RETRY_DELAY", 0)
+    calls = []
+
+    async def send_batch(chan_id, batch):
+        calls.append(chan_id)
+        return False
+
+    pipeline = run_pipeline(send_batch, [(1, "a", {"id": "1"})])
+    assert calls == [1]
+    assert pipeline.sent == 0 and pipeline.failed == 1
+
+
+def test_drain_gives_up_after_timeout():
+    async def send_batch(chan_id, batch):
+        await asyncio.sleep(10)
+        return True
+
+    pipeline = run_pipeline(send_batch, [(1, "a", {"id": "1"})], timeout=0.2)
+    assert pipeline.depth == 0
+    assert not pipeline._workers
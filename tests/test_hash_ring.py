@@ -0,0 +1,21 @@
+from collections import Counter
+
+from main import HashRing
+
+
+def test_hash_ring_is_stable_and_balanced():
+    handles = [f"user{i}" for i in range(5000)]
+    ring = HashRing(2)
+    owners = Counter(ring.owner(handle) for handle in handles)
+    assert set(owners) == {0, 1}
+    assert min(owners.values()) > 2000
+    assert ring.owner("User1") == ring.owner("user1")
+
+
+def test_hash_ring_moves_few_handles_when_growing():
+    handles = [f"user{i}" for i in range(5000)]
+    before, after = HashRing(3), HashRing(4)
+    moved = sum(before.owner(handle) != after.owner(handle) for handle in handles)
+    assert moved < len(handles) * 0.35
+    # Les comptes déplacés vont tous vers le nouveau worker
+    assert all(after.owner(h) == 3 for h in handles if before.owner(h) != after.owner(h))
@@ -0,0 +1,23 @@
+import pytest
+
+from main import parse_import_file
+
+
+def test_json_list_and_objects():
+    data = b'["alpha", {"handle": "beta", "channel": "#news"}, 3]'
+    assert parse_import_file("subs.json", data) == [("alpha", None), ("beta", "#news")]
+
+
+def test_json_object_with_handles_key():
+    assert parse_import_file("subs.json", b'{"handles": ["alpha"]}') == [("alpha", None)]
+
+
+@pytest.mark.parametrize("data", [b"42", b'"alpha"', b"null", b'{"handles": "alpha"}'])
+def test_json_scalar_is_rejected(data):
+    with pytest.raises(ValueError):
+        parse_import_file("subs.json", data)
+
+
+def test_csv_with_header_and_optional_channel():
+    data = "\ufeffhandle,channel\nalpha,#news\nbeta\n\n".encode()
+    assert parse_import_file("subs.csv", data) == [("alpha", "#news"), ("beta", None)]
@@ -0,0 +1,122 @@
+import asyncio
+
+from main import (BREAKER_BASE_COOLDOWN, BREAKER_FAILURE_THRESHOLD, INSTANCE_CONCURRENCY, InstanceHealth,
+                  NitterInstancePool, TwitterMonitorBot)
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.headers = {}
+
+    async def read(self):
+        return b""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, status):
+        self.status = status
+
+    def get(self, url, headers=None):
+        return FakeResponse(self.status)
+
+
+def half_open_pool():
+    pool = NitterInstancePool(["http://a", "http://b"])
+    instance = pool.instances[0]
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        pool.record_failure(instance)
+    instance.open_until = 0.0
+    return pool, instance
+
+
+def test_breaker_opens_after_consecutive_failures():
+    pool = NitterInstancePool(["http://a", "http://b"])
+    instance = pool.instances[0]
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        pool.record_failure(instance)
+    assert instance.state == InstanceHealth.CLOSED
+    pool.record_failure(instance)
+    assert instance.state == InstanceHealth.OPEN
+    assert instance not in pool.ranked()
+
+
+def test_half_open_allows_a_single_probe():
+    pool, instance = half_open_pool()
+    assert instance in pool.ranked()
+    assert instance.state == InstanceHealth.HALF_OPEN
+    assert pool.try_acquire(instance)
+    assert not pool.try_acquire(instance)
+    assert instance not in pool.ranked()
+
+
+def test_successful_probe_closes_breaker():
+    pool, instance = half_open_pool()
+    pool.ranked()
+    pool.try_acquire(instance)
+    pool.record_success(instance, 0.1)
+    assert instance.state == InstanceHealth.CLOSED
+    assert instance.cooldown == BREAKER_BASE_COOLDOWN
+    assert instance in pool.ranked()
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    pool, instance = half_open_pool()
+    pool.ranked()
+    pool.try_acquire(instance)
+    pool.record_failure(instance)
+    assert instance.state == InstanceHealth.OPEN
+    assert instance.cooldown == BREAKER_BASE_COOLDOWN * 2
+
+
+def test_blocked_instance_counts_as_failure():
+    async def run():
+        bot = TwitterMonitorBot()
+        bot.http_session = FakeSession(403)
+        instance = bot.instance_pool.instances[0]
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            assert await bot._fetch_from_instance(instance, "user") is None
+        return instance
+
+    instance = asyncio.run(run())
+    assert instance.state == InstanceHealth.OPEN
+
+
+def test_missing_account_does_not_penalise_instance():
+    async def run():
+        bot = TwitterMonitorBot()
+        bot.http_session = FakeSession(404)
+        instance = bot.instance_pool.instances[0]
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            assert await bot._fetch_from_instance(instance, "user") is None
+        return instance
+
+    instance = asyncio.run(run())
+    assert instance.state == InstanceHealth.CLOSED
+    assert instance.error_rate == 0.0
+
+
+def test_probe_cancelled_while_queued_does_not_block_instance():
+    async def run():
+        bot = TwitterMonitorBot()
+        bot.http_session = FakeSession(304)
+        bot.instance_pool = pool
+        for _ in range(INSTANCE_CONCURRENCY):
+            await instance.semaphore.acquire()
+        task = asyncio.create_task(bot._fetch_from_instance(instance, "user"))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        for _ in range(INSTANCE_CONCURRENCY):
+            instance.semaphore.release()
+
+    pool, instance = half_open_pool()
+    assert instance in pool.ranked()
+    asyncio.run(run())
+    assert instance in pool.ranked()
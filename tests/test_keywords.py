@@ -0,0 +1,55 @@
+from main import AhoCorasick, KeywordMatcher, split_keywords, validate_keyword_regex
+
+
+def test_aho_corasick_finds_overlapping_keywords():
+    automaton = AhoCorasick({"he": {"a"}, "she": {"b"}, "hers": {"c"}, "zzz": {"d"}})
+    assert automaton.search("ushers") == {"a", "b", "c"}
+
+
+def test_literal_keywords_are_case_insensitive():
+    matcher = KeywordMatcher({(1, "include"): ["Bannière"], (2, "exclude"): ["leak"]})
+    assert matcher.match("Nouvelle BANNIÈRE disponible") == {(1, "include")}
+    assert matcher.match("LEAK de la 2.0") == {(2, "exclude")}
+
+
+def test_combined_regexes_report_each_guild():
+    matcher = KeywordMatcher({(1, "include"): ["re:v\\d\\.\\d"], (2, "include"): ["re:^maintenance"]})
+    assert matcher.match("Maintenance v2.1 ce soir") == {(1, "include"), (2, "include")}
+    assert matcher.match("Patch v2.1") == {(1, "include")}
+
+
+def test_global_inline_flags_do_not_break_other_guilds():
+    matcher = KeywordMatcher({(1, "include"): ["re:(?i)banner"], (2, "include"): ["re:event"]})
+    assert matcher.match("New BANNER and event") == {(1, "include"), (2, "include")}
+
+
+def test_backreference_keeps_its_meaning():
+    matcher = KeywordMatcher({(1, "include"): ["re:(a)\\1"], (2, "include"): ["re:x"]})
+    assert matcher.match("baab") == {(1, "include")}
+    assert matcher.match("abab x") == {(2, "include")}
+
+
+def test_named_group_clash_is_isolated():
+    matcher = KeywordMatcher({(1, "include"): ["re:(?P<p0>x)"], (2, "include"): ["re:y"]})
+    assert matcher.match("x y") == {(1, "include"), (2, "include")}
+
+
+def test_invalid_regex_only_drops_that_filter():
+    matcher = KeywordMatcher({(1, "include"): ["re:(", "code"], (2, "exclude"): ["re:spam"]})
+    assert matcher.match("code spam") == {(1, "include"), (2, "exclude")}
+
+
+def test_validate_keyword_regex():
+    assert validate_keyword_regex("(?i)banner") is None
+    assert validate_keyword_regex("(") is not None
+
+
+def test_split_keywords_keeps_regex_quantifiers():
+    assert split_keywords("banner, re:v\\d{1,2}\\.\\d, leak") == ["banner", "re:v\\d{1,2}\\.\\d", "leak"]
+    matcher = KeywordMatcher({(1, "include"): split_keywords("re:v\\d{1,2}\\.\\d")})
+    assert matcher.match("Patch v12.3") == {(1, "include")}
+
+
+def test_split_keywords_respects_classes_groups_and_escapes():
+    assert split_keywords("re:[,(]x, re:(a,b), re:a\\,b, c") == ["re:[,(]x", "re:(a,b)", "re:a\\,b", "c"]
+    assert split_keywords(" , a ,, b,") == ["a", "b"]
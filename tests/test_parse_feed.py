@@ -0,0 +1,67 @@
+import main
+from main import parse_feed
+
+
+def build_feed(items: list[tuple[str, str]]) -> bytes:
+    """Flux Nitter minimal : (id, titre) dans l'ordre du flux"""
+    body = "".join(
+        f"<item><title>{title}</title><description>{title}</description>"
+        f"<pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate>"
+        f"<guid>https://nitter.net/user/status/{tweet_id}#m</guid>"
+        f"<link>https://nitter.net/user/status/{tweet_id}#m</link></item>"
+        for tweet_id, title in items
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>user</title>{body}</channel></rss>'.encode()
+
+
+def ids(entries):
+    return [entry["id"] for entry in entries]
+
+
+def test_returns_newest_first():
+    feed = build_feed([("105", "a"), ("104", "b"), ("103", "c")])
+    assert ids(parse_feed(feed, "user")) == ["105", "104", "103"]
+
+
+def test_filters_numerically_against_cursor():
+    feed = build_feed([("1000", "a"), ("999", "b"), ("99", "c")])
+    assert ids(parse_feed(feed, "user", since_id="999")) == ["1000"]
+
+
+def test_older_retweet_does_not_hide_newer_tweets():
+    # Un retweet porte l'ID (plus ancien) du tweet original
+    feed = build_feed([("105", "a"), ("50", "RT @other: b"), ("103", "c")])
+    assert ids(parse_feed(feed, "user", since_id="100")) == ["105", "103"]
+
+
+def test_pinned_tweet_first_is_skipped():
+    feed = build_feed([("10", "épinglé"), ("105", "a"), ("104", "b")])
+    assert ids(parse_feed(feed, "user", since_id="100")) == ["105", "104"]
+
+
+def test_limit_keeps_highest_ids():
+    feed = build_feed([("10", "épinglé"), ("105", "a"), ("104", "b")])
+    assert ids(parse_feed(feed, "user", limit=1)) == ["105"]
+
+
+def test_no_new_entries_is_empty_list():
+    feed = build_feed([("100", "a"), ("99", "b")])
+    assert parse_feed(feed, "user", since_id="100") == []
+
+
+def test_empty_feed_is_none():
+    assert parse_feed(build_feed([]), "user") is None
+
+
+def test_empty_feed_skips_fallback(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("feedparser ne doit pas être appelé")
+
+    monkeypatch.setattr(main.feedparser, "parse", fail)
+    assert parse_feed(build_feed([]), "user") is None
+
+
+def test_malformed_feed_uses_fallback():
+    feed = build_feed([("105", "a & b"), ("104", "c")])
+    entries = parse_feed(feed, "user", since_id="104")
+    assert ids(entries) == ["105"]
@@ -0,0 +1,53 @@
+from main import SubscriptionRegistry
+
+
+def test_add_rejects_duplicates_and_counts():
+    registry = SubscriptionRegistry()
+    assert registry.add(1, 10, "a") is not None
+    assert registry.add(1, 10, "a") is None
+    registry.add(1, 11, "a")
+    registry.add(2, 20, "b")
+    assert len(registry) == 3
+    assert registry.handle_count == 2
+    assert registry.guild_counts(1) == (2, 2)
+    assert registry.guild_ids("a") == {1}
+
+
+def test_indexes_by_channel_and_guild():
+    registry = SubscriptionRegistry()
+    registry.add(1, 10, "a")
+    registry.add(1, 10, "b")
+    registry.add(1, 11, "c")
+    assert registry.channel_handles(10) == ["a", "b"]
+    assert registry.guild_handles(1) == {"a", "b", "c"}
+    assert registry.channel_guild(11) == 1
+
+
+def test_remove_frees_handle_and_counters():
+    registry = SubscriptionRegistry()
+    registry.add(1, 10, "a")
+    registry.add(2, 20, "a")
+    assert registry.remove(1, 10, "a") is not None
+    assert "a" in registry
+    assert registry.remove(2, 20, "a") is not None
+    assert "a" not in registry
+    assert len(registry) == 0
+    assert registry.guild_counts(1) == (0, 0)
+    assert registry.remove(2, 20, "a") is None
+
+
+def test_handle_ids_are_reused():
+    registry = SubscriptionRegistry()
+    first = registry.add(1, 10, "a")
+    registry.remove(1, 10, "a")
+    second = registry.add(1, 10, "b")
+    assert second.handle_id == first.handle_id
+    assert registry.handle(second) == "b"
+
+
+def test_get_checks_guild():
+    registry = SubscriptionRegistry()
+    subscription = registry.add(1, 10, "a")
+    subscription.cursor = "5"
+    assert registry.get(1, 10, "a").cursor == "5"
+    assert registry.get(2, 10, "a") is None
@@ -0,0 +1,28 @@
+from main import PollScheduler
+
+
+def test_pop_due_returns_expired_handles_in_order():
+    scheduler = PollScheduler()
+    scheduler.schedule("b", 20.0)
+    scheduler.schedule("a", 10.0)
+    scheduler.schedule("c", 30.0)
+    assert scheduler.pop_due(25.0) == ["a", "b"]
+    assert scheduler.last_lag == 15.0
+    assert len(scheduler) == 1 and "c" in scheduler
+
+
+def test_reschedule_replaces_previous_deadline():
+    scheduler = PollScheduler()
+    scheduler.schedule("a", 10.0)
+    scheduler.schedule("a", 50.0)
+    assert scheduler.pop_due(20.0) == []
+    assert scheduler.next_due() == 50.0
+
+
+def test_unschedule_skips_stale_entries():
+    scheduler = PollScheduler()
+    scheduler.schedule("a", 10.0)
+    scheduler.schedule("b", 15.0)
+    scheduler.unschedule("a")
+    assert scheduler.next_due() == 15.0
+    assert scheduler.pop_due(100.0) == ["b"]
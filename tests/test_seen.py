@@ -0,0 +1,39 @@
+from main import SeenSet, SEEN_BLOOM_CAPACITY, SEEN_LRU_SIZE
+
+
+def test_added_ids_are_seen():
+    seen = SeenSet()
+    seen.add("100")
+    assert "100" in seen
+    assert "99" not in seen
+
+
+def test_ids_above_max_are_always_new():
+    seen = SeenSet()
+    for tweet_id in range(1, 500):
+        seen.add(str(tweet_id))
+    assert seen.max_id == "499"
+    assert "500" not in seen
+
+
+def test_old_ids_survive_lru_eviction_through_bloom():
+    seen = SeenSet()
+    for tweet_id in range(1, SEEN_LRU_SIZE + 10):
+        seen.add(str(tweet_id))
+    assert "1" not in seen.recent
+    assert "1" in seen
+
+
+def test_generations_rotate_when_full():
+    seen = SeenSet()
+    for tweet_id in range(1, SEEN_BLOOM_CAPACITY * 2 + 2):
+        seen.add(str(tweet_id))
+    assert seen.count <= SEEN_BLOOM_CAPACITY
+    assert str(SEEN_BLOOM_CAPACITY * 2) in seen
+
+
+def test_round_trip_from_stored_state():
+    seen = SeenSet()
+    seen.add("42")
+    restored = SeenSet(list(seen.recent), bytes(seen.current), bytes(seen.previous), seen.count, seen.max_id)
+    assert "42" in restored
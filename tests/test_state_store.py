@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from main import SeenSet, StateStore
+
+
+def open_store():
+    store = StateStore(":memory:")
+    store.open()
+    return store
+
+
+def rows(store, table):
+    return sorted(store._conn.execute(f"SELECT * FROM {table}").fetchall())
+
+
+def test_flush_merges_mutations_by_key():
+    store = open_store()
+    store.put_subscription(1, 10, "a")
+    store.put_cursor(1, 10, "a", "5")
+    store.put_cursor(1, 10, "a", "7")
+    store.put_subscription(1, 11, "b")
+    store.delete_subscription(1, 11, "b")
+    assert store.pending_count == 4
+
+    asyncio.run(store.flush())
+    assert store.pending_count == 0
+    assert rows(store, "subscriptions") == [(1, 10, "a")]
+    assert rows(store, "cursors") == [(1, 10, "a", "7")]
+
+
+def test_delete_removes_written_rows():
+    store = open_store()
+    store.put_subscription(1, 10, "a")
+    store.put_cursor(1, 10, "a", "5")
+    asyncio.run(store.flush())
+
+    store.delete_subscription(1, 10, "a")
+    asyncio.run(store.flush())
+    assert rows(store, "subscriptions") == []
+    assert rows(store, "cursors") == []
+
+
+def test_load_round_trip():
+    store = open_store()
+    checked_at = datetime(2026, 1, 2, 3, 4, 5)
+    seen = SeenSet()
+    seen.add("42")
+    store.put_subscription(1, 10, "a")
+    store.put_subscription(2, 20, "b")
+    store.put_cursor(1, 10, "a", "41")
+    store.put_settings(1, {"check_interval": 300})
+    store.put_last_check("a", checked_at)
+    store.put_posting_stats("a", {"rate": 1.5})
+    store.put_seen("a", seen)
+    asyncio.run(store.flush())
+
+    state = store.load()
+    assert sorted(state["subscriptions"]) == [(1, 10, "a", "41"), (2, 20, "b", None)]
+    assert state["guild_settings"] == {1: {"check_interval": 300}}
+    assert state["last_checks"] == {"a": checked_at}
+    assert state["posting_stats"] == {"a": {"rate": 1.5}}
+    assert "42" in state["seen_ids"]["a"]
+    assert state["seen_ids"]["a"].max_id == "42"
+
+
+def test_failed_write_is_requeued_without_overwriting_newer_mutations(monkeypatch):
+    store = open_store()
+    store.put_cursor(1, 10, "a", "5")
+    store.put_subscription(1, 10, "a")
+
+    def failing_write(batch):
+        store.put_cursor(1, 10, "a", "6")  # mutation arrivée pendant l'écriture
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_batch", failing_write)
+    with pytest.raises(OSError):
+        asyncio.run(store.flush())
+    assert store._pending[("cursors", 1, 10, "a")] == (1, 10, "a", "6")
+    assert store.is_pending("subscriptions", 1, 10, "a")
+
+    monkeypatch.undo()
+    asyncio.run(store.flush())
+    assert rows(store, "cursors") == [(1, 10, "a", "6")]
+
+
+def test_cancelled_flush_waits_for_the_write():
+    store = open_store()
+    write_batch = store._write_batch
+
+    def slow_write(batch):
+        time.sleep(0.2)
+        write_batch(batch)
+
+    store._write_batch = slow_write
+    store.put_subscription(1, 10, "a")
+
+    async def run():
+        flush = asyncio.create_task(store.flush())
+        await asyncio.sleep(0.05)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    asyncio.run(run())
+    # L'écriture a abouti malgré l'annulation : rien à remettre en attente
+    assert store.pending_count == 0
+    assert rows(store, "subscriptions") == [(1, 10, "a")]
+
+
+def test_cancelled_failing_flush_requeues_batch():
+    store = open_store()
+
+    def slow_failing_write(batch):
+        time.sleep(0.2)
+        raise OSError("locked")
+
+    store._write_batch = slow_failing_write
+    store.put_subscription(1, 10, "a")
+
+    async def run():
+        flush = asyncio.create_task(store.flush())
+        await asyncio.sleep(0.05)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    asyncio.run(run())
+    assert store.is_pending("subscriptions", 1, 10, "a")
+
+
+def test_close_waits_for_inflight_flush_and_writes_the_rest(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.open()
+    store.put_subscription(1, 10, "a")
+
+    async def run():
+        flush = asyncio.create_task(store.flush())
+        await asyncio.sleep(0)
+        store.put_subscription(2, 20, "b")
+        await store.close()
+        await flush
+
+    asyncio.run(run())
+    assert store._conn is None
+
+    reopened = StateStore(path)
+    reopened.open()
+    assert sorted(reopened.load()["subscriptions"]) == [(1, 10, "a", None), (2, 20, "b", None)]
+
+
+def test_archived_tweets_are_never_rewritten():
+    store = open_store()
+    tweet = {"id": "1", "url": "https://x.com/a/status/1", "text": "Nouvelle bannière", "published_at": None}
+    store.put_tweets("a", [tweet])
+    asyncio.run(store.flush())
+    store.put_tweets("a", [{**tweet, "text": "modifié"}])
+    asyncio.run(store.flush())
+
+    assert [row[3] for row in rows(store, "tweets")] == ["Nouvelle bannière"]
+    assert [row[0] for row in asyncio.run(store.search_tweets("banniere"))] == ["a"]